@@ -3,252 +3,356 @@ from tkinter import ttk, filedialog
 import matplotlib.pyplot as plt
 from matplotlib.backends.backend_tkagg import FigureCanvasTkAgg
 import numpy as np
-import random
 import time
-import csv
+from collections import deque
+from gc_engine import ALGORITHMS, MEMORY_SIZE, GCManagerWithReferenceCounting, GenerationalGCManager, SemiSpaceGCManager
+from gc_runner import SimulationRunner
+from gc_export import cycle_record, make_exporter
+from heap import LayoutMirror
+from gc_snapshots import SnapshotStore
+from metrics import CAPACITY, Series
+from process_memory import ProcessMemorySampler, format_bytes
 
 
 # Constants
-MEMORY_SIZE = 1000
-OBJECT_RANGE = (20, 100)
 ALLOCATION_CYCLES = 30
-DELAY = 500  # milliseconds
-
-class MemoryBlock:
-    def __init__(self, size, id):
-        self.size = size
-        self.id = id
-        self.marked = False
-        self.start_index = None
-
-class RefCountedObject:
-    def __init__(self, size, id):
-        self.size = size
-        self.id = id
-        self.ref_count = random.randint(0, 2)
-        self.start_index = None
-
-class MemoryManager:
-    def __init__(self, total_memory):
-        self.total_memory = total_memory
-        self.memory = []
-        self.allocated_memory = []
-        self.memory_usage = []
-        self.memory_layout = [-1] * self.total_memory
-        self.benchmark_times = []
-
-    def allocate(self):
-        size = random.randint(*OBJECT_RANGE)
-        start = self.find_space(size)
-        if start is not None:
-            obj = MemoryBlock(size, len(self.allocated_memory))
-            obj.start_index = start
-            self.memory.append(obj)
-            self.allocated_memory.append(obj)
-            for i in range(start, start + size):
-                self.memory_layout[i] = obj.id
-            return obj
-        return None
-
-    def find_space(self, size):
-        count = 0
-        start = 0
-        for i in range(self.total_memory):
-            if self.memory_layout[i] == -1:
-                if count == 0:
-                    start = i
-                count += 1
-                if count == size:
-                    return start
-            else:
-                count = 0
-        return None
-
-    def get_used_memory(self):
-        return sum(obj.size for obj in self.memory)
-
-    def mark(self):
-        for obj in self.memory:
-            obj.marked = random.choice([True, False])
-
-    def sweep(self):
-        before = len(self.memory)
-        new_memory = []
-        self.memory_layout = [-1] * self.total_memory
-        for obj in self.memory:
-            if obj.marked:
-                new_memory.append(obj)
-        self.memory = new_memory
-        for obj in self.memory:
-            start = self.find_space(obj.size)
-            if start is not None:
-                obj.start_index = start
-                for i in range(start, start + obj.size):
-                    self.memory_layout[i] = obj.id
-        return before - len(self.memory)
-
-    def compact(self):
-        self.memory.sort(key=lambda x: x.id)
-        self.memory_layout = [-1] * self.total_memory
-        current = 0
-        for obj in self.memory:
-            obj.start_index = current
-            for i in range(current, current + obj.size):
-                self.memory_layout[i] = obj.id
-            current += obj.size
-
-    def simulate_cycle(self):
-        start_time = time.time()
-        self.allocate()
-        self.mark()
-        collected = self.sweep()
-        self.compact()
-        used = self.get_used_memory()
-        self.memory_usage.append(used)
-        end_time = time.time()
-        self.benchmark_times.append(end_time - start_time)
-        return collected, used, self.memory_layout.copy()
-
-class GCManagerWithReferenceCounting(MemoryManager):
-    def allocate(self):
-        size = random.randint(*OBJECT_RANGE)
-        start = self.find_space(size)
-        if start is not None:
-            obj = RefCountedObject(size, len(self.allocated_memory))
-            obj.start_index = start
-            self.memory.append(obj)
-            self.allocated_memory.append(obj)
-            for i in range(start, start + size):
-                self.memory_layout[i] = obj.id
-            return obj
-        return None
-
-    def simulate_cycle(self):
-        start_time = time.time()
-        self.allocate()
-        collected = self.collect_garbage()
-        self.compact()
-        used = self.get_used_memory()
-        self.memory_usage.append(used)
-        end_time = time.time()
-        self.benchmark_times.append(end_time - start_time)
-        return collected, used, self.memory_layout.copy()
-
-    def collect_garbage(self):
-        before = len(self.memory)
-        new_memory = []
-        self.memory_layout = [-1] * self.total_memory
-        for obj in self.memory:
-            if obj.ref_count > 0:
-                new_memory.append(obj)
-        self.memory = new_memory
-        for obj in self.memory:
-            start = self.find_space(obj.size)
-            if start is not None:
-                obj.start_index = start
-                for i in range(start, start + obj.size):
-                    self.memory_layout[i] = obj.id
-        return before - len(self.memory)
+DELAY = 500  # milliseconds between cycles at the default speed
+HISTORY_POINTS = 500  # most points drawn on the memory chart
+MAX_FPS = 20  # frames drawn per second at most, however fast the simulation runs
+MEMORY_SAMPLE_INTERVAL = 0.1  # seconds between samples of the simulator's own memory
 
 class GCVisualizer(tk.Tk):
     def __init__(self):
         super().__init__()
         self.title("Efficient Garbage Collector Simulator")
         self.geometry("1000x800")
-        self.cycle = 0
         self.manager = None
+        self.runner = None
+        self.sampler = None
+        self.mirror = None
+        self.store = None
+        self.scrub_live = True
+        self.scrub_cycle = 0
         self.selected_algo = tk.StringVar(value="Mark and Sweep")
+        self.speed = tk.DoubleVar(value=1000 / DELAY)
         self.start_time = None
+        self.last_stats = None
+        self.records = deque(maxlen=CAPACITY)
+        self.exporter = None
+        self.memory_history = Series()
+        self.latest = None
+        self.background = None
         self.setup_ui()
-        self.after_id = None
+        self.frame_id = None
+        self.protocol("WM_DELETE_WINDOW", self.on_close)
 
     def setup_ui(self):
         control_frame = ttk.Frame(self)
         control_frame.pack(pady=10)
 
         ttk.Label(control_frame, text="GC Algorithm:").grid(row=0, column=0, padx=5)
-        algo_dropdown = ttk.Combobox(control_frame, textvariable=self.selected_algo, values=["Mark and Sweep", "Reference Counting"], state="readonly")
+        algo_dropdown = ttk.Combobox(control_frame, textvariable=self.selected_algo, values=list(ALGORITHMS), state="readonly")
         algo_dropdown.grid(row=0, column=1, padx=5)
 
         self.start_button = ttk.Button(control_frame, text="Start Simulation", command=self.start_simulation)
         self.start_button.grid(row=0, column=2, padx=10)
 
-        self.export_button = ttk.Button(control_frame, text="Export Logs to CSV", command=self.export_logs)
+        self.export_button = ttk.Button(control_frame, text="Export Logs", command=self.export_logs)
         self.export_button.grid(row=0, column=3, padx=10)
 
+        self.pause_button = ttk.Button(control_frame, text="Pause", command=self.toggle_pause)
+        self.pause_button.grid(row=1, column=0, padx=5)
+
+        self.step_button = ttk.Button(control_frame, text="Step", command=self.step_cycle)
+        self.step_button.grid(row=1, column=1, padx=5)
+
+        ttk.Label(control_frame, text="Cycles/sec (0 = unlimited):").grid(row=1, column=2, padx=5)
+        speed_box = ttk.Spinbox(control_frame, from_=0, to=10000, increment=1, textvariable=self.speed, width=8, command=self.change_speed)
+        speed_box.grid(row=1, column=3, padx=5)
+        speed_box.bind("<Return>", lambda event: self.change_speed())
+
         self.status_label = ttk.Label(control_frame, text="Status: Ready")
-        self.status_label.grid(row=1, column=0, columnspan=4, pady=5)
+        self.status_label.grid(row=2, column=0, columnspan=4, pady=5)
 
         self.benchmark_label = ttk.Label(control_frame, text="Benchmark: -")
-        self.benchmark_label.grid(row=2, column=0, columnspan=4)
+        self.benchmark_label.grid(row=3, column=0, columnspan=4)
+
+        self.phase_label = ttk.Label(control_frame, text="Phases: -")
+        self.phase_label.grid(row=4, column=0, columnspan=4)
+
+        self.process_label = ttk.Label(control_frame, text="Process: -")
+        self.process_label.grid(row=5, column=0, columnspan=4)
 
         self.fig, (self.ax1, self.ax2) = plt.subplots(2, 1, figsize=(10, 6))
         self.fig.tight_layout(pad=3.0)
 
-        self.line, = self.ax1.plot([], [], marker='o', label='Used Memory')
+        # Animated artists are left out of full redraws and blitted over a cached background instead.
+        self.line, = self.ax1.plot([], [], marker='o', label='Used Memory', animated=True)
         self.ax1.set_title('Memory Usage Over Time')
         self.ax1.set_xlabel('Cycle')
         self.ax1.set_ylabel('Used Memory')
         self.ax1.set_ylim(0, MEMORY_SIZE)
-        self.ax1.legend()
+        self.ax1.legend(loc='upper left')
         self.ax1.grid(True)
 
-        self.fragment_display = self.ax2.imshow(np.zeros((1, MEMORY_SIZE)), aspect='auto', cmap='tab20', interpolation='nearest', vmin=-1, vmax=20)
+        # The simulator's own resident memory on a second axis, sampled by psutil on its own thread.
+        self.ax_process = self.ax1.twinx()
+        self.rss_line, = self.ax_process.plot([], [], color='tab:red', label='Process RSS', animated=True)
+        self.ax_process.set_ylabel('Process Memory (MB)')
+        self.ax_process.set_ylim(0, 1)
+        self.ax_process.legend(loc='upper right')
+
+        self.ax1.set_xlim(0, ALLOCATION_CYCLES)
+
+        self.fragment_display = self.ax2.imshow(np.full((1, 1), -1), aspect='auto', cmap='tab20', interpolation='nearest', vmin=-1, vmax=20,
+                                                extent=(0, MEMORY_SIZE, 1, 0), animated=True)
         self.ax2.set_title('Memory Fragmentation')
         self.ax2.set_yticks([])
 
         self.canvas = FigureCanvasTkAgg(self.fig, master=self)
+        self.canvas.mpl_connect("draw_event", self.on_draw)
         self.canvas.get_tk_widget().pack()
 
-    def start_simulation(self):
-        self.cycle = 0
-        algo = self.selected_algo.get()
-        if algo == "Reference Counting":
-            self.manager = GCManagerWithReferenceCounting(MEMORY_SIZE)
-        else:
-            self.manager = MemoryManager(MEMORY_SIZE)
+        # Every cycle's layout is kept as compressed deltas, so the heatmap can show any past cycle.
+        self.scrub = tk.Scale(self, from_=1, to=1, orient=tk.HORIZONTAL, length=800, label="Heatmap cycle (rightmost follows the simulation)",
+                              command=self.on_scrub)
+        self.scrub.pack()
 
-        self.start_time = time.time()
-        self.run_cycle()
+    def on_draw(self, event):
+        # Runs after every full redraw, including resizes: cache everything but the animated artists.
+        self.background = self.canvas.copy_from_bbox(self.fig.bbox)
+        self.draw_artists()
+
+    def draw_artists(self):
+        self.ax1.draw_artist(self.line)
+        self.ax_process.draw_artist(self.rss_line)
+        self.ax2.draw_artist(self.fragment_display)
 
-    def run_cycle(self):
-        if self.cycle < ALLOCATION_CYCLES:
-            collected, used, layout = self.manager.simulate_cycle()
-            self.line.set_xdata(range(len(self.manager.memory_usage)))
-            self.line.set_ydata(self.manager.memory_usage)
-            self.ax1.set_xlim(0, ALLOCATION_CYCLES)
+    def blit(self):
+        if self.background is None:
+            self.canvas.draw()
+            return
+        self.canvas.restore_region(self.background)
+        self.draw_artists()
+        self.canvas.blit(self.fig.bbox)
 
-            visual_array = np.array(layout).reshape((1, -1))
-            self.fragment_display.set_data(visual_array)
+    def start_simulation(self):
+        if self.runner is not None:
+            self.runner.stop()
+        self.stop_sampler()
+        self.close_exporter()
+        self.records.clear()
+        self.last_stats = None
+        self.latest = None
+        self.memory_history = Series()
+        self.manager = ALGORITHMS[self.selected_algo.get()](MEMORY_SIZE)
+        self.mirror = LayoutMirror(MEMORY_SIZE)
+        self.store = SnapshotStore(MEMORY_SIZE)
+        self.scrub_live = True
+        self.scrub_cycle = 0
+        # The collector runs on its own thread; render_frame drains its updates at most MAX_FPS times a second.
+        runner = self.runner = SimulationRunner(self.manager, cycles=ALLOCATION_CYCLES, cycles_per_second=self.read_speed(), summarize=self.summarize)
+        try:
+            self.sampler = ProcessMemorySampler(MEMORY_SAMPLE_INTERVAL, clock=lambda: runner.cycle)
+        except RuntimeError as exc:
+            self.process_label.config(text=str(exc))
+        self.pause_button.config(text="Pause")
 
-            avg_time = np.mean(self.manager.benchmark_times)
-            self.status_label.config(text=f"Cycle {self.cycle+1}: Used={used}, Collected={collected}")
-            self.benchmark_label.config(text=f"Avg GC Time: {avg_time:.4f} sec")
+        self.start_time = time.time()
+        self.ax1.set_xlim(0, ALLOCATION_CYCLES)
+        self.rss_line.set_data([], [])
+        self.canvas.draw()
+        self.runner.start()
+        if self.sampler is not None:
+            self.sampler.start()
+        if self.frame_id is None:
+            self.frame_id = self.after(1000 // MAX_FPS, self.render_frame)
+
+    def read_speed(self):
+        try:
+            return max(0.0, self.speed.get())
+        except tk.TclError:
+            return 1000 / DELAY
+
+    def change_speed(self):
+        if self.runner is not None:
+            self.runner.set_speed(self.read_speed())
+
+    def toggle_pause(self):
+        if self.runner is None:
+            return
+        if self.runner.paused:
+            self.runner.resume()
+            self.pause_button.config(text="Pause")
+        else:
+            self.runner.pause()
+            self.pause_button.config(text="Resume")
 
+    def step_cycle(self):
+        if self.runner is None:
+            return
+        if not self.runner.paused:
+            self.toggle_pause()
+        self.runner.step()
+
+    def summarize(self, manager):
+        # Runs on the simulation thread, so the GUI never reads the manager while it is changing.
+        max_pause, p99_pause = manager.pause_stats()
+        status = f"Moved={manager.cells_moved} ({manager.compactions} compactions)"
+        if isinstance(manager, GenerationalGCManager):
+            minor, major = manager.minor_times, manager.major_times
+            status += f" | Minor GCs: {len(minor)} (avg {minor.mean * 1000:.3f} ms), Major GCs: {len(major)} (avg {major.mean * 1000:.3f} ms)"
+        elif isinstance(manager, SemiSpaceGCManager):
+            status += f" | Flips: {manager.flips}, Active Half: {manager.space_base}-{manager.space_base + manager.semispace_size}"
+        elif isinstance(manager, GCManagerWithReferenceCounting):
+            status += f" | RC Updates: {manager.engine.updates} for {manager.engine.writes} writes"
+        benchmark = f"Avg GC Time: {manager.benchmark_times.mean:.4f} sec | Max Pause: {max_pause * 1000:.3f} ms | p99 Pause: {p99_pause * 1000:.3f} ms"
+        return {"status": status, "benchmark": benchmark, "gc_time": manager.benchmark_times.last}
+
+    def render_frame(self):
+        runner = self.runner
+        if runner is not None:
+            updates = runner.drain()
+            for update in updates:
+                self.apply_update(update)
+            if updates:
+                self.draw_frame()
+            if runner.done():
+                self.finish_simulation()
+        self.frame_id = self.after(1000 // MAX_FPS, self.render_frame)
+
+    def apply_update(self, update):
+        self.mirror.apply(update.changes)
+        self.store.append(update.changes)
+        self.memory_history.append(update.used)
+        self.last_stats = update.stats
+        record = cycle_record(update.cycle, update.used, update.collected, update.summary["gc_time"], update.stats)
+        self.records.append(record)
+        if self.exporter is not None:
+            self.exporter.append(record)
+        self.latest = update
+
+    def finish_simulation(self):
+        runner, self.runner = self.runner, None
+        self.stop_sampler()
+        self.close_exporter()
+        if runner.error is not None:
+            self.status_label.config(text=f"Simulation Failed: {runner.error}")
+            return
+        total_time = time.time() - self.start_time
+        self.status_label.config(text="Simulation Completed")
+        max_pause, p99_pause = self.manager.pause_stats()
+        self.benchmark_label.config(text=f"Total Time: {total_time:.2f} sec | Avg GC Time: {self.manager.benchmark_times.mean:.4f} sec | Max Pause: {max_pause * 1000:.3f} ms | p99 Pause: {p99_pause * 1000:.3f} ms")
+
+    def draw_frame(self):
+        x, y = self.memory_history.history(HISTORY_POINTS)
+        self.line.set_data(x, y)
+        # The heatmap is rendered at the axes' pixel width rather than one column per heap cell.
+        self.update_scrub()
+        self.draw_heatmap()
+        self.update_labels(self.latest)
+        # Axis limits are part of the cached background, so growing them needs one full redraw.
+        redraw = self.draw_process_memory()
+        if len(x) and x[-1] >= self.ax1.get_xlim()[1]:
+            self.ax1.set_xlim(0, 2 * x[-1])
+            redraw = True
+        if redraw:
             self.canvas.draw()
-            self.cycle += 1
-            self.after_id = self.after(DELAY, self.run_cycle)
         else:
-            total_time = time.time() - self.start_time
-            self.status_label.config(text="Simulation Completed")
-            self.benchmark_label.config(text=f"Total Time: {total_time:.2f} sec | Avg GC Time: {np.mean(self.manager.benchmark_times):.4f} sec")
+            self.blit()
+
+    def draw_process_memory(self):
+        if self.sampler is None or not len(self.sampler):
+            return False
+        cycles, rss = self.sampler.values("rss")
+        rss = rss / 2 ** 20
+        self.rss_line.set_data(cycles, rss)
+        last = self.sampler.last
+        self.process_label.config(text=f"Process: RSS {format_bytes(last['rss'])} | VMS {format_bytes(last['vms'])}"
+                                       f" | System Available {format_bytes(last['available'])}")
+        if rss.max() >= self.ax_process.get_ylim()[1]:
+            self.ax_process.set_ylim(0, 2 * rss.max())
+            return True
+        return False
+
+    def draw_heatmap(self):
+        layout = self.mirror.snapshot() if self.scrub_live else self.store.layout(self.scrub_cycle - 1)
+        width = max(1, int(self.ax2.bbox.width))
+        self.fragment_display.set_data(layout.render_array(width).reshape((1, -1)))
+
+    def update_scrub(self):
+        self.scrub.config(to=max(1, len(self.store)))
+        if self.scrub_live:
+            self.scrub_cycle = len(self.store)
+            self.scrub.set(self.scrub_cycle)
+
+    def on_scrub(self, value):
+        # Scale.set() also ends up here, later and with the value it was given; only a new value is a user's move.
+        cycle = int(float(value))
+        if self.store is None or not len(self.store) or cycle == self.scrub_cycle:
+            return
+        self.scrub_cycle = cycle
+        self.scrub_live = cycle >= len(self.store)
+        self.draw_heatmap()
+        self.blit()
+
+    def update_labels(self, update):
+        self.status_label.config(text=f"Cycle {update.cycle}: Used={update.used}, Collected={update.collected}, {update.summary['status']}")
+        self.benchmark_label.config(text=update.summary["benchmark"])
+        self.update_phase_label()
+
+    def update_phase_label(self):
+        stats = self.last_stats
+        if stats is None:
+            return
+        phases = " | ".join(f"{name.replace('_', ' ').title()}: {ns / 1e6:.3f} ms" for name, ns in stats.phases.items() if ns)
+        frag = stats.fragmentation
+        self.phase_label.config(text=f"{phases} | Objects Visited: {stats.counters['objects_visited']} | Cells Touched: {stats.counters['cells_touched']}"
+                                     f" | Largest Free: {frag['largest_free']} | Free Extents: {frag['free_extents']} | Fragmentation: {frag['external_fragmentation']:.2f}")
 
     def export_logs(self):
-        if not self.manager or not self.manager.memory_usage:
+        if not self.manager or not self.records:
             self.status_label.config(text="No data to export yet!")
             return
 
-        file_path = filedialog.asksaveasfilename(defaultextension=".csv", filetypes=[("CSV files", "*.csv")])
+        file_path = filedialog.asksaveasfilename(defaultextension=".csv", filetypes=[("CSV files", "*.csv"), ("NumPy array", "*.npy"),
+                                                                                       ("NumPy archive", "*.npz"), ("Parquet", "*.parquet")])
         if not file_path:
             return
 
-        with open(file_path, mode='w', newline='') as file:
-            writer = csv.writer(file)
-            writer.writerow(["Cycle", "Used Memory", "GC Time (sec)"])
-            for i, (mem, t) in enumerate(zip(self.manager.memory_usage, self.manager.benchmark_times), start=1):
-                writer.writerow([i, mem, round(t, 6)])
-
-        self.status_label.config(text=f"Logs exported to: {file_path}")
+        self.close_exporter()
+        try:
+            exporter = make_exporter(file_path)
+        except ValueError as exc:
+            self.status_label.config(text=str(exc))
+            return
+        # The cycles still held in memory go first; while the simulation runs, later cycles are
+        # appended as they arrive and the file is closed when it ends.
+        for record in self.records:
+            exporter.append(record)
+        if self.runner is None:
+            exporter.close()
+            self.status_label.config(text=f"Logs exported to: {file_path}")
+        else:
+            self.exporter = exporter
+            self.status_label.config(text=f"Streaming logs to: {file_path}")
+
+    def stop_sampler(self):
+        if self.sampler is not None:
+            self.sampler.stop()
+            self.sampler = None
+
+    def close_exporter(self):
+        if self.exporter is not None:
+            self.exporter.close()
+            self.exporter = None
+
+    def on_close(self):
+        if self.runner is not None:
+            self.runner.stop()
+        self.stop_sampler()
+        self.close_exporter()
+        self.destroy()
 
 # Run the final GUI
 if __name__ == "__main__":
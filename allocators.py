@@ -0,0 +1,230 @@
+import bisect
+
+
+class MaxTree:
+    # Segment tree over addresses holding, for each node, the longest free extent starting in its
+    # range. Only nodes over free extents are stored, so the size follows the extent count times the
+    # tree depth rather than the heap size. Finding the lowest extent of at least a given length is
+    # one descent from the root.
+    def __init__(self, total_memory):
+        self.leaves = 1 << max(0, total_memory - 1).bit_length()
+        self.nodes = {}
+
+    def set(self, start, length):
+        nodes = self.nodes
+        get = nodes.get
+        i = self.leaves + start
+        if length:
+            nodes[i] = length
+        else:
+            nodes.pop(i, None)
+        while i > 1:
+            sibling = get(i ^ 1, 0)
+            if sibling > length:
+                length = sibling
+            i >>= 1
+            if get(i, 0) == length:
+                break
+            if length:
+                nodes[i] = length
+            else:
+                del nodes[i]
+
+    def first_fit(self, size, lo=0):
+        # Lowest start >= lo of an extent of at least size cells, or None.
+        nodes = self.nodes
+        i = self.leaves + lo
+        while nodes.get(i, 0) < size:
+            # Climb while i is a right child, then step to the next subtree to the right.
+            while i & 1:
+                i >>= 1
+            if not i:
+                return None
+            i += 1
+        while i < self.leaves:
+            i = 2 * i if nodes.get(2 * i, 0) >= size else 2 * i + 1
+        return i - self.leaves
+
+
+class FreeExtentIndex:
+    def __init__(self, total_memory):
+        self.total_memory = total_memory
+        self.reset()
+
+    def reset(self):
+        self.starts = []
+        self.lengths = {}
+        self.by_size = []
+        self.bins = {}
+        self.free_total = 0
+        self.tree = MaxTree(self.total_memory)
+        if self.total_memory > 0:
+            self._insert(0, self.total_memory)
+
+    @staticmethod
+    def size_class(length):
+        return length.bit_length() - 1
+
+    def _insert(self, start, length):
+        bisect.insort(self.starts, start)
+        self.lengths[start] = length
+        self.free_total += length
+        bisect.insort(self.by_size, (length, start))
+        bisect.insort(self.bins.setdefault(self.size_class(length), []), start)
+        self.tree.set(start, length)
+
+    def _remove(self, start):
+        length = self.lengths.pop(start)
+        self.free_total -= length
+        del self.starts[bisect.bisect_left(self.starts, start)]
+        del self.by_size[bisect.bisect_left(self.by_size, (length, start))]
+        bin_starts = self.bins[self.size_class(length)]
+        del bin_starts[bisect.bisect_left(bin_starts, start)]
+        self.tree.set(start, 0)
+        return length
+
+    def largest(self):
+        return self.by_size[-1][0] if self.by_size else 0
+
+    def total_free(self):
+        return self.free_total
+
+    def extent_count(self):
+        return len(self.starts)
+
+    def external_fragmentation(self):
+        return 1 - self.largest() / self.free_total if self.free_total else 0.0
+
+    def histogram(self):
+        # Free extent counts by power-of-two size class: entry k counts lengths in [2**k, 2**(k + 1)).
+        counts = [0] * max(1, self.total_memory.bit_length())
+        for size_class, starts in self.bins.items():
+            counts[size_class] = len(starts)
+        return counts
+
+    def first_fit(self, size, lo=0):
+        return self.tree.first_fit(max(size, 1), lo)
+
+    def containing(self, start):
+        i = bisect.bisect_right(self.starts, start) - 1
+        if i >= 0:
+            free_start = self.starts[i]
+            if start < free_start + self.lengths[free_start]:
+                return free_start
+        return None
+
+    def take(self, start, size):
+        free_start = self.containing(start)
+        if free_start is None or start + size > free_start + self.lengths[free_start]:
+            raise ValueError(f"Range {start}:{start + size} is not free")
+        length = self._remove(free_start)
+        if start > free_start:
+            self._insert(free_start, start - free_start)
+        end = free_start + length
+        if start + size < end:
+            self._insert(start + size, end - start - size)
+
+    def release(self, start, size):
+        end = start + size
+        i = bisect.bisect_left(self.starts, start)
+        if i > 0:
+            prev = self.starts[i - 1]
+            if prev + self.lengths[prev] == start:
+                start = prev
+                self._remove(prev)
+        if end in self.lengths:
+            end += self._remove(end)
+        self._insert(start, end - start)
+
+
+class Allocator:
+    name = None
+
+    def __init__(self, total_memory):
+        self.free = FreeExtentIndex(total_memory)
+
+    def find(self, size):
+        raise NotImplementedError
+
+    def allocate(self, size):
+        start = self.find(size)
+        if start is not None:
+            self.reserve(start, size)
+        return start
+
+    def reserve(self, start, size):
+        self.free.take(start, size)
+
+    def release(self, start, size):
+        self.free.release(start, size)
+
+    def reset(self):
+        self.free.reset()
+
+
+class FirstFitAllocator(Allocator):
+    name = "first-fit"
+
+    def find(self, size):
+        return self.free.first_fit(size)
+
+
+class NextFitAllocator(Allocator):
+    name = "next-fit"
+
+    def __init__(self, total_memory):
+        super().__init__(total_memory)
+        self.cursor = 0
+
+    def find(self, size):
+        # The first fit at or after the cursor, wrapping around to the bottom of the heap.
+        start = self.free.first_fit(size, self.cursor) if self.cursor < self.free.total_memory else None
+        return start if start is not None else self.free.first_fit(size)
+
+    def reserve(self, start, size):
+        super().reserve(start, size)
+        self.cursor = start + size
+
+    def reset(self):
+        super().reset()
+        self.cursor = 0
+
+
+class BestFitAllocator(Allocator):
+    name = "best-fit"
+
+    def find(self, size):
+        i = bisect.bisect_left(self.free.by_size, (size, -1))
+        if i < len(self.free.by_size):
+            return self.free.by_size[i][1]
+        return None
+
+
+class SegregatedFitAllocator(Allocator):
+    name = "segregated-fit"
+
+    def find(self, size):
+        # Every extent in a class above the request's fits, so the lowest one of the first such class
+        # is taken without a scan; so is the head of the request's own class when size is a power of
+        # two. Only when no larger class has an extent is the largest one, which may be in the
+        # request's class, tried instead.
+        free = self.free
+        if free.largest() < size:
+            return None
+        bins = free.bins
+        size_class = FreeExtentIndex.size_class(size)
+        if size == 1 << size_class and bins.get(size_class):
+            return bins[size_class][0]
+        for other in sorted(k for k in bins if k > size_class and bins[k]):
+            return bins[other][0]
+        return free.by_size[-1][1]
+
+
+ALLOCATORS = {cls.name: cls for cls in (FirstFitAllocator, NextFitAllocator, BestFitAllocator, SegregatedFitAllocator)}
+
+
+def make_allocator(name, total_memory):
+    try:
+        return ALLOCATORS[name](total_memory)
+    except KeyError:
+        raise ValueError(f"Unknown allocator '{name}', choose from {', '.join(ALLOCATORS)}") from None
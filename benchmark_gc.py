@@ -0,0 +1,256 @@
+import argparse
+import gc
+import itertools
+import json
+import platform
+import statistics
+import sys
+from time import perf_counter, perf_counter_ns
+
+from compaction import COMPACTORS
+from gc_engine import ALGORITHMS, NURSERY_FRACTION, OBJECT_RANGE, GenerationalGCManager, SemiSpaceGCManager, algorithm_key, make_manager
+
+HEAP_SIZES = [10**3, 10**4, 10**5, 10**6]
+LIVE_RATIOS = [0.05, 0.25, 0.5, 0.75, 0.95]
+MAX_OBJECTS = 200_000  # caps the object count on very large heaps, which are then only partly filled
+ROOTS = 16
+FANOUT = 4
+# Timing metrics compared against a baseline; the rest are reported for context.
+TIMED_METRICS = ["alloc_s_per_object", "collect_s", "max_pause_s", "compact_s"]
+
+
+def uniform_sizes(rng, heap_size):
+    return rng.randint(*OBJECT_RANGE)
+
+
+def scaled_sizes(rng, heap_size):
+    # About a thousand objects fill the heap whatever its size.
+    return rng.randint(max(1, heap_size // 2000), max(1, heap_size // 1000))
+
+
+def bimodal_sizes(rng, heap_size):
+    if rng.random() < 0.9:
+        return rng.randint(2, 16)
+    return rng.randint(max(2, heap_size // 2000), max(2, heap_size // 500))
+
+
+DISTRIBUTIONS = {"uniform": uniform_sizes, "scaled": scaled_sizes, "bimodal": bimodal_sizes}
+
+
+def populate(manager, distribution, live_ratio, max_objects, capacity, hold_garbage=False):
+    # Fills `capacity` cells with a tree of live objects hanging off ROOTS roots, interleaved with
+    # garbage chains (closed into a cycle every eighth object) so reference counting has cascades and
+    # cycles. Stops before an object that would not fit, so no collector has to collect to make room;
+    # any collection that still runs inside allocate is counted and left out of the allocation time.
+    # With hold_garbage, the first root refers to every garbage object, which keeps the garbage
+    # alive through collections until that root is dropped.
+    rng = manager.size_rng
+    pauses = manager.pause_times
+    holder = None
+    if hold_garbage:
+        holder = manager.allocate(1)
+        manager.add_root(holder)
+    live = []
+    dead = []
+    alloc_ns = 0
+    gc_ns = 0
+    allocated = 0
+    objects = 0
+    while allocated < capacity and objects < max_objects:
+        size = distribution(rng, capacity)
+        if allocated + size > capacity:
+            break
+        paused = pauses.total
+        start = perf_counter_ns()
+        obj = manager.allocate(size)
+        elapsed = perf_counter_ns() - start
+        collection_ns = min(elapsed, int((pauses.total - paused) * 1e9))
+        alloc_ns += elapsed - collection_ns
+        gc_ns += collection_ns
+        if obj is None:
+            break
+        objects += 1
+        allocated += size
+        if rng.random() < live_ratio:
+            if len(live) < ROOTS:
+                manager.add_root(obj)
+            else:
+                manager.add_ref(live[(len(live) - ROOTS) // FANOUT], obj)
+            live.append(obj)
+        else:
+            # A generational nursery collection may already have freed earlier garbage.
+            if dead and len(dead) % 8:
+                if dead[-1].start_index is not None:
+                    manager.add_ref(obj, dead[-1])
+            elif dead and dead[-8].start_index is not None:
+                manager.add_ref(dead[-8], obj)
+            if holder is not None:
+                manager.add_ref(holder, obj)
+            dead.append(obj)
+    return objects, alloc_ns, len(pauses), gc_ns
+
+
+def tenure(manager):
+    # Moves the live tree and the held garbage out of the nursery with one more minor collection, then
+    # drops the root holding the garbage, so the major collection that follows sweeps and compacts a
+    # full old generation. Returns the collection's pause in nanoseconds.
+    paused = manager.pause_times.total
+    manager.collect_generation()
+    manager.remove_root(0)
+    return int((manager.pause_times.total - paused) * 1e9)
+
+
+def full_collect(manager):
+    if isinstance(manager, GenerationalGCManager):
+        manager.major_pending = True
+        return manager.collect_generation()
+    if isinstance(manager, SemiSpaceGCManager):
+        return manager.flip()
+    return manager.collect()
+
+
+def run_case(algorithm, heap_size, distribution, live_ratio, seed, max_objects, compactor):
+    # Every collector gets heap_size cells to fill before the measured collection, so live_ratio holds
+    # at the same fill. The generational heap adds a nursery of the usual fraction on top of an old
+    # generation of heap_size cells (plus one for the garbage holder). Survivors are tenured at the
+    # first minor collection and major collections only run on request. The population's minor
+    # collections therefore move everything to the old generation, and the measured collection is a
+    # real major one. The semi-space collector gets two halves of heap_size each, so it never flips
+    # during population.
+    total_memory = heap_size
+    generational = algorithm == "generational"
+    kwargs = {}
+    if algorithm == "reference-counting":
+        kwargs["cycle_interval"] = 1
+    elif generational:
+        kwargs["nursery_size"] = int(heap_size * NURSERY_FRACTION)
+        kwargs["tenure_age"] = 1
+        kwargs["major_interval"] = sys.maxsize
+        total_memory = kwargs["nursery_size"] + heap_size + 1
+    elif algorithm == "semi-space-copying":
+        total_memory = 2 * heap_size
+    manager = make_manager(algorithm, total_memory, seed=seed, compactor=compactor, compact_threshold=0.0, **kwargs)
+    instruments = manager.instruments
+    gc.disable()
+    try:
+        objects, alloc_ns, populate_collections, populate_gc_ns = populate(manager, DISTRIBUTIONS[distribution], live_ratio, max_objects, heap_size, generational)
+        if generational:
+            populate_gc_ns += tenure(manager)
+            populate_collections += 1
+        used = manager.get_used_memory()
+        instruments.end_cycle()
+        pauses = len(manager.pause_times)
+        start = perf_counter()
+        collected = full_collect(manager)
+        collect_s = perf_counter() - start
+        stats = instruments.end_cycle()
+    finally:
+        gc.enable()
+    return {
+        "objects": objects,
+        "alloc_s_per_object": alloc_ns / 1e9 / objects if objects else 0.0,
+        "alloc_per_s": objects / (alloc_ns / 1e9) if alloc_ns else 0.0,
+        "fill": used / heap_size,
+        "populate_collections": populate_collections,
+        "populate_gc_s": populate_gc_ns / 1e9,
+        "collected": collected,
+        "collect_s": collect_s,
+        "max_pause_s": max(manager.pause_times.recent(len(manager.pause_times) - pauses), default=collect_s),
+        "compact_s": stats.phases["compact"] / 1e9,
+        "cells_touched": stats.counters["cells_touched"],
+        "cells_moved": stats.counters["cells_moved"],
+    }
+
+
+def summarize(values):
+    return {
+        "mean": statistics.fmean(values),
+        "stdev": statistics.stdev(values) if len(values) > 1 else 0.0,
+        "median": statistics.median(values),
+        "min": min(values),
+        "max": max(values),
+        "n": len(values),
+    }
+
+
+def case_key(algorithm, heap_size, distribution, live_ratio):
+    return f"{algorithm}|heap={heap_size}|dist={distribution}|live={live_ratio}"
+
+
+def run_suite(args):
+    cases = {}
+    for algorithm, heap_size, distribution, live_ratio in itertools.product(args.algorithms, args.heap_sizes, args.distributions, args.live_ratios):
+        key = case_key(algorithm, heap_size, distribution, live_ratio)
+        for warmup in range(args.warmup):
+            run_case(algorithm, heap_size, distribution, live_ratio, args.seed - 1 - warmup, args.max_objects, args.compactor)
+        runs = [run_case(algorithm, heap_size, distribution, live_ratio, args.seed + repeat, args.max_objects, args.compactor) for repeat in range(args.repeats)]
+        cases[key] = {metric: summarize([run[metric] for run in runs]) for metric in runs[0]}
+        print_case(key, cases[key])
+    return cases
+
+
+def print_case(key, metrics):
+    print(f"{key:<58}{metrics['objects']['median']:>9.0f} obj{metrics['fill']['median']:>6.2f} fill"
+          f"{metrics['alloc_s_per_object']['median'] * 1e6:>9.2f} us/alloc"
+          f"{metrics['collect_s']['median'] * 1e3:>10.3f} ms GC"
+          f"{metrics['max_pause_s']['median'] * 1e3:>10.3f} ms pause"
+          f"{metrics['compact_s']['median'] * 1e3:>10.3f} ms compact"
+          f"{metrics['cells_moved']['median']:>12.0f} moved")
+
+
+def compare(cases, baseline, threshold, min_delta):
+    regressions = []
+    for key, metrics in cases.items():
+        base = baseline.get(key)
+        if base is None:
+            continue
+        for metric in TIMED_METRICS:
+            old, new = base[metric]["median"], metrics[metric]["median"]
+            if new > old * (1 + threshold) and new - old > min_delta:
+                regressions.append((key, metric, old, new))
+    return regressions
+
+
+def parse_size(text):
+    return int(float(text))
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(description="Benchmark allocation throughput, pause time and compaction cost of the collectors")
+    parser.add_argument("--algorithms", nargs="+", default=[algorithm_key(name) for name in ALGORITHMS], choices=[algorithm_key(name) for name in ALGORITHMS])
+    parser.add_argument("--heap-sizes", type=parse_size, nargs="+", default=HEAP_SIZES, help="cells, e.g. 1e3 1e8")
+    parser.add_argument("--distributions", nargs="+", default=list(DISTRIBUTIONS), choices=list(DISTRIBUTIONS))
+    parser.add_argument("--live-ratios", type=float, nargs="+", default=LIVE_RATIOS)
+    parser.add_argument("--compactor", default="lisp2", choices=list(COMPACTORS))
+    parser.add_argument("--max-objects", type=int, default=MAX_OBJECTS)
+    parser.add_argument("--warmup", type=int, default=1)
+    parser.add_argument("--repeats", type=int, default=5)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", default=None, help="write results as JSON, usable as a later --baseline")
+    parser.add_argument("--baseline", default=None, help="compare medians against a previous --output file")
+    parser.add_argument("--threshold", type=float, default=0.10, help="relative slowdown reported as a regression")
+    parser.add_argument("--min-delta", type=float, default=1e-6, help="ignore slowdowns smaller than this many seconds")
+    return parser
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    cases = run_suite(args)
+    if args.output:
+        meta = {key: value for key, value in vars(args).items() if key not in ("output", "baseline")}
+        meta.update(python=sys.version.split()[0], machine=platform.machine(), processor=platform.processor())
+        with open(args.output, mode='w') as file:
+            json.dump({"meta": meta, "cases": cases}, file, indent=1)
+    if not args.baseline:
+        return 0
+    with open(args.baseline) as file:
+        baseline = json.load(file)["cases"]
+    regressions = compare(cases, baseline, args.threshold, args.min_delta)
+    for key, metric, old, new in regressions:
+        print(f"REGRESSION {key} {metric}: {old * 1e3:.4f} ms -> {new * 1e3:.4f} ms ({new / old - 1:+.1%})")
+    print(f"{len(regressions)} regressions against {args.baseline}")
+    return 1 if regressions else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
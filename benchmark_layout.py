@@ -0,0 +1,90 @@
+import argparse
+import random
+import time
+
+from allocators import make_allocator
+from heap import make_heap
+
+
+class ListLayout:
+    def __init__(self, total_memory):
+        self.total_memory = total_memory
+        self.cells = [-1] * total_memory
+
+    def find(self, size):
+        count = 0
+        start = 0
+        for i in range(self.total_memory):
+            if self.cells[i] == -1:
+                if count == 0:
+                    start = i
+                count += 1
+                if count == size:
+                    return start
+            else:
+                count = 0
+        return None
+
+    def place(self, obj_id, size):
+        start = self.find(size)
+        if start is not None:
+            for i in range(start, start + size):
+                self.cells[i] = obj_id
+        return start
+
+    def place_at(self, obj_id, start, size):
+        for i in range(start, start + size):
+            self.cells[i] = obj_id
+
+    def clear(self):
+        self.cells = [-1] * self.total_memory
+
+
+def run_workload(layout, sizes):
+    placed = []
+    for obj_id, size in enumerate(sizes):
+        if layout.place(obj_id, size) is not None:
+            placed.append((obj_id, size))
+    survivors = placed[::2]
+    layout.clear()
+    for obj_id, size in survivors:
+        layout.place(obj_id, size)
+    layout.clear()
+    current = 0
+    for obj_id, size in survivors:
+        layout.place_at(obj_id, current, size)
+        current += size
+
+
+def time_layout(name, factory, sizes, repeats):
+    best = float("inf")
+    for _ in range(repeats):
+        layout = factory()
+        start = time.perf_counter()
+        run_workload(layout, sizes)
+        best = min(best, time.perf_counter() - start)
+    print(f"{name:<24}{best:>12.4f} sec")
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare per-cell list loops with NumPy, memory-mapped and extent heap layouts")
+    parser.add_argument("--cells", type=int, default=10**6)
+    parser.add_argument("--objects", type=int, default=200)
+    parser.add_argument("--repeats", type=int, default=3)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    mean_size = args.cells // args.objects
+    sizes = [rng.randint(mean_size // 2, mean_size) for _ in range(args.objects)]
+
+    print(f"Heap of {args.cells} cells, {args.objects} objects, best of {args.repeats}")
+    baseline = time_layout("per-cell list", lambda: ListLayout(args.cells), sizes, args.repeats)
+    for mode in ("dense", "mapped", "extents"):
+        elapsed = time_layout(f"{mode} heap", lambda: make_heap(mode, args.cells, make_allocator("first-fit", args.cells)), sizes, args.repeats)
+        print(f"{'':<24}{baseline / elapsed:>11.1f}x faster")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,77 @@
+import argparse
+import os
+import time
+
+import numpy as np
+
+from object_graph import mark_csr, mark_from_roots
+from parallel_mark import MARK_MODES, parallel_mark
+
+
+class Node:
+    __slots__ = ("refs",)
+
+    def __init__(self, refs):
+        self.refs = refs
+
+
+def random_graph(nodes, degree, seed):
+    rng = np.random.default_rng(seed)
+    counts = rng.poisson(degree, nodes)
+    indptr = np.zeros(nodes + 1, dtype=np.int64)
+    np.cumsum(counts, out=indptr[1:])
+    indices = rng.integers(0, nodes, int(indptr[-1]), dtype=np.int64)
+    return indptr, indices
+
+
+def serial_object_mark(indptr, indices, roots):
+    objects = [Node(indices[indptr[i]:indptr[i + 1]].tolist()) for i in range(len(indptr) - 1)]
+    marks = bytearray(len(objects))
+    mark_from_roots(roots.tolist(), objects, marks)
+    return np.frombuffer(marks, dtype=np.uint8).astype(bool)
+
+
+def best_time(function, repeats):
+    best = float("inf")
+    result = None
+    for _ in range(repeats):
+        start = time.perf_counter()
+        result = function()
+        best = min(best, time.perf_counter() - start)
+    return best, result
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Scaling of the work-stealing parallel marker against the serial markers")
+    parser.add_argument("--nodes", type=int, default=10**6)
+    parser.add_argument("--degree", type=float, default=3.0)
+    parser.add_argument("--roots", type=int, default=64)
+    parser.add_argument("--workers", type=int, nargs="+", default=list(range(1, (os.cpu_count() or 1) + 1)))
+    parser.add_argument("--modes", nargs="+", default=list(MARK_MODES), choices=list(MARK_MODES))
+    parser.add_argument("--repeats", type=int, default=3)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    indptr, indices = random_graph(args.nodes, args.degree, args.seed)
+    roots = np.random.default_rng(args.seed + 1).integers(0, args.nodes, args.roots)
+    print(f"{args.nodes} nodes, {len(indices)} edges, {args.roots} roots, best of {args.repeats}, {os.cpu_count()} CPUs")
+
+    serial, expected = best_time(lambda: mark_csr(indptr, indices, roots, args.nodes), args.repeats)
+    objects, by_objects = best_time(lambda: serial_object_mark(indptr, indices, roots), 1)
+    if not np.array_equal(by_objects, expected):
+        raise SystemExit("Frontier marker and object marker disagree")
+    print(f"{'serial object marker':<24}{objects:>10.4f} sec  (includes building the objects)")
+    print(f"{'serial frontier marker':<24}{serial:>10.4f} sec  {int(expected.sum())} marked")
+
+    for mode in args.modes:
+        one = None
+        for workers in args.workers:
+            elapsed, marked = best_time(lambda: parallel_mark(indptr, indices, roots, args.nodes, workers, mode), args.repeats)
+            if not np.array_equal(marked, expected):
+                raise SystemExit(f"{mode} marker with {workers} workers differs from the serial marker")
+            one = one or elapsed
+            print(f"{mode + ' x' + str(workers):<24}{elapsed:>10.4f} sec  {one / elapsed:>5.2f}x vs 1 worker  {serial / elapsed:>5.2f}x vs serial  matches serial")
+
+
+if __name__ == "__main__":
+    main()
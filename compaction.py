@@ -0,0 +1,44 @@
+COMPACT_THRESHOLD = 0.5  # external fragmentation (1 - largest free run / free cells) that triggers compaction
+
+
+def lisp2_compact(heap, objects, base=0):
+    # Lisp2 sliding compaction: compute forwarding addresses in address order, then slide each
+    # object down to its address. References are object ids, so the pointer-update pass has nothing
+    # to rewrite. Objects already at their forwarding address are not touched.
+    objects.sort(key=lambda obj: obj.start_index)
+    moved = 0
+    free = base
+    for obj in objects:
+        if obj.start_index != free:
+            heap.move(obj.id, obj.start_index, free)
+            obj.start_index = free
+            moved += obj.size
+        free += obj.size
+    return moved
+
+
+def two_finger_compact(heap, objects, base=0):
+    # Two-finger compaction for variable sizes: take objects from the top of the heap and move each
+    # into the lowest hole below it that fits. Cheaper than sliding, but does not keep address order
+    # and can leave holes too small for the remaining objects.
+    objects.sort(key=lambda obj: obj.start_index, reverse=True)
+    moved = 0
+    for obj in objects:
+        target = heap.lowest_fit(obj.size)
+        if target is None or target >= obj.start_index:
+            continue
+        heap.move(obj.id, obj.start_index, target)
+        obj.start_index = target
+        moved += obj.size
+    objects.sort(key=lambda obj: obj.start_index)
+    return moved
+
+
+COMPACTORS = {"lisp2": lisp2_compact, "two-finger": two_finger_compact}
+
+
+def make_compactor(name):
+    try:
+        return COMPACTORS[name]
+    except KeyError:
+        raise ValueError(f"Unknown compactor '{name}', choose from {', '.join(COMPACTORS)}") from None
@@ -0,0 +1,163 @@
+import argparse
+import json
+import os
+import sys
+import time
+
+from allocators import ALLOCATORS
+from heap import LAYOUT_MODES, check_layout
+from compaction import COMPACT_THRESHOLD, COMPACTORS
+from gc_engine import ALGORITHMS, MEMORY_SIZE, OBJECT_RANGE, algorithm_key, make_manager
+from parallel_mark import MARK_MODES
+from gc_trace import TraceReplayer, TraceWriter, count_cycles
+from gc_export import EXPORTERS, check_export_path, cycle_record, make_exporter
+from gc_snapshots import SnapshotStore
+from workloads import WORKLOADS
+from instrumentation import CsvSubscriber, Instrumentation, PrometheusSubscriber
+from process_memory import ProcessMemorySampler
+
+DEFAULT_CYCLES = 1000
+
+
+def run_headless(manager, cycles, exporter=None, keep_records=False, snapshots=None):
+    # Records go to the exporter as they are made; only a JSON result keeps them all in memory.
+    records = []
+    phase_seconds = {}
+    latest = []
+    total_collected = 0
+    record = None
+
+    def on_cycle_stats(stats):
+        for name, ns in stats.phases.items():
+            phase_seconds[name] = phase_seconds.get(name, 0.0) + ns / 1e9
+        latest[:] = [stats]
+
+    callback = manager.instruments.subscribe(on_cycle_stats)
+    manager.layout_snapshots = False
+    if snapshots is not None:
+        manager.heap.record_changes()
+    start_time = time.perf_counter()
+    for cycle in range(1, cycles + 1):
+        collected, used, _ = manager.simulate_cycle()
+        total_collected += collected
+        if snapshots is not None:
+            snapshots.append(manager.heap.drain_changes())
+        record = cycle_record(cycle, used, collected, manager.benchmark_times.last, latest[0])
+        if exporter is not None:
+            exporter.append(record)
+        if keep_records:
+            records.append(record)
+    wall_time = time.perf_counter() - start_time
+    manager.instruments.unsubscribe(callback)
+    max_pause, p99_pause = manager.pause_stats()
+    summary = {
+        "cycles": cycles,
+        "wall_time": wall_time,
+        "avg_gc_time": manager.benchmark_times.mean,
+        "max_pause": max_pause,
+        "p99_pause": p99_pause,
+        "total_collected": total_collected,
+        "final_used_memory": record["used_memory"] if record else 0,
+        "final_fragmentation": record["external_fragmentation"] if record else 0.0,
+        "compactions": manager.compactions,
+        "cells_moved": manager.cells_moved,
+        "phase_seconds": phase_seconds,
+        "metrics": manager.metrics.summary(),
+    }
+    return records, summary
+
+
+def write_results(path, config, summary, records):
+    with open(path, mode='w') as file:
+        json.dump({"config": config, "summary": summary, "cycles": records}, file, indent=1)
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(description="Run garbage collector simulations without a display")
+    parser.add_argument("--algorithm", default="mark-and-sweep", choices=[algorithm_key(name) for name in ALGORITHMS])
+    parser.add_argument("--cycles", type=int, default=None, help=f"defaults to the cycles in --replay, else {DEFAULT_CYCLES}")
+    parser.add_argument("--memory", type=int, default=MEMORY_SIZE)
+    parser.add_argument("--allocator", default="first-fit", choices=list(ALLOCATORS))
+    parser.add_argument("--layout", default="extents", choices=list(LAYOUT_MODES))
+    parser.add_argument("--map-dir", default=None, metavar="DIR", help="where --layout mapped keeps its heap and mark files (default: the system temporary directory)")
+    parser.add_argument("--compactor", default="lisp2", choices=list(COMPACTORS))
+    parser.add_argument("--compact-threshold", type=float, default=COMPACT_THRESHOLD, help="fragmentation above which the heap is compacted")
+    parser.add_argument("--mark-workers", type=int, default=0, help="mark with N work-stealing workers (0 = serial)")
+    parser.add_argument("--mark-mode", default="threads", choices=list(MARK_MODES))
+    parser.add_argument("--object-range", type=int, nargs=2, default=list(OBJECT_RANGE), metavar=("MIN", "MAX"))
+    parser.add_argument("--workload", default=None, choices=list(WORKLOADS), help="size, lifetime and burst model (default: one uniform object a cycle)")
+    parser.add_argument("--seed", type=int, default=None)
+    parser.add_argument("--output", default=None, help=f"per-cycle results: .json (held in memory), or streamed as {', '.join(EXPORTERS)}; summary only on stdout if omitted")
+    parser.add_argument("--snapshots", default=None, metavar="PATH", help="store every cycle's heap layout as compressed deltas with keyframes")
+    parser.add_argument("--phase-csv", default=None, metavar="PATH", help="per-cycle phase timings and counters")
+    parser.add_argument("--prometheus", default=None, metavar="PATH", help="write totals in the Prometheus text format")
+    parser.add_argument("--count-allocations", action="store_true", help="report Python memory blocks allocated per cycle")
+    parser.add_argument("--tracemalloc", action="store_true", help="report traced Python memory per cycle (slow)")
+    parser.add_argument("--sample-memory", type=float, default=None, metavar="SECONDS", help="sample the process's RSS, VMS and available system memory every SECONDS with psutil")
+    trace = parser.add_mutually_exclusive_group()
+    trace.add_argument("--record", default=None, metavar="PATH", help="write the allocation and mutation events to a binary trace")
+    trace.add_argument("--replay", default=None, metavar="PATH", help="drive the mutator from a recorded trace instead of the RNG")
+    return parser
+
+
+def main(argv=None):
+    parser = build_parser()
+    args = parser.parse_args(argv)
+    streamed = args.output is not None and not args.output.endswith(".json")
+    if streamed and os.path.splitext(args.output)[1].lower() not in EXPORTERS:
+        parser.error(f"--output must end in .json or one of {', '.join(EXPORTERS)}")
+    # Everything that can reject the arguments runs before any output or trace file is created.
+    try:
+        check_layout(args.layout, args.allocator)
+        if streamed:
+            check_export_path(args.output)
+    except ValueError as exc:
+        parser.error(str(exc))
+    sampler = None
+    if args.sample_memory:
+        try:
+            sampler = ProcessMemorySampler(args.sample_memory)
+        except RuntimeError as exc:
+            parser.error(str(exc))
+    if args.cycles is None:
+        args.cycles = count_cycles(args.replay) if args.replay else DEFAULT_CYCLES
+    recorder = TraceWriter(args.record) if args.record else None
+    replay = TraceReplayer(args.replay) if args.replay else None
+    instruments = Instrumentation(count_allocations=args.count_allocations, trace_memory=args.tracemalloc)
+    phase_csv = instruments.subscribe(CsvSubscriber(args.phase_csv)) if args.phase_csv else None
+    prometheus = instruments.subscribe(PrometheusSubscriber(labels={"algorithm": args.algorithm})) if args.prometheus else None
+    manager = make_manager(args.algorithm, args.memory, allocator=args.allocator, layout_mode=args.layout,
+                           compactor=args.compactor, compact_threshold=args.compact_threshold,
+                           mark_workers=args.mark_workers, mark_mode=args.mark_mode, map_dir=args.map_dir,
+                           object_range=tuple(args.object_range), workload=args.workload, seed=args.seed, recorder=recorder, replay=replay,
+                           instruments=instruments)
+    exporter = make_exporter(args.output) if streamed else None
+    snapshots = SnapshotStore(args.memory, path=args.snapshots) if args.snapshots else None
+    if sampler is not None:
+        sampler.start()
+    try:
+        records, summary = run_headless(manager, args.cycles, exporter, keep_records=args.output is not None and not streamed, snapshots=snapshots)
+    finally:
+        if sampler is not None:
+            sampler.stop()
+        if exporter is not None:
+            exporter.close()
+        if snapshots is not None:
+            snapshots.close()
+        if recorder is not None:
+            recorder.close()
+        if phase_csv is not None:
+            phase_csv.close()
+    if sampler is not None:
+        summary["process_memory"] = sampler.summary()
+    if prometheus is not None:
+        prometheus.write(args.prometheus)
+    config = {key: value for key, value in vars(args).items() if key != "output"}
+    if args.output and not streamed:
+        write_results(args.output, config, summary, records)
+    json.dump({"config": config, "summary": summary}, sys.stdout, indent=1)
+    print()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,761 @@
+import random
+
+import numpy as np
+from time import perf_counter
+
+from allocators import make_allocator
+from heap import make_heap
+from object_graph import mark_from_roots, new_refs, to_csr
+from parallel_mark import parallel_mark
+from incremental import COMPACT, IDLE, MARK, SWEEP, Budget, TriColorMarker
+from refcount import RefCountEngine
+from instrumentation import Instrumentation
+from compaction import COMPACT_THRESHOLD, make_compactor
+from object_table import MappedObjectTable, ObjectTable
+from metrics import MetricsStore
+from workloads import make_workload
+
+
+# Constants
+MEMORY_SIZE = 1000
+OBJECT_RANGE = (20, 100)
+WORKLOAD = None  # None allocates one uniform object a cycle; else a name from workloads.WORKLOADS or a Workload
+ALLOCATOR = "first-fit"  # first-fit, next-fit, best-fit, segregated-fit
+LAYOUT_MODE = "extents"  # extents, dense (NumPy per-cell array), mapped (dense, backed by a file)
+MAP_DIR = None  # where mapped heaps keep their files; None uses the system temporary directory
+COMPACTOR = "lisp2"  # lisp2 (sliding, keeps address order), two-finger
+MARK_WORKERS = 0  # 0 marks serially; N > 0 marks with N work-stealing workers
+MARK_MODE = "threads"  # threads, processes (shared-memory NumPy arrays)
+ROOT_SET_SIZE = 8
+MAX_REFS = 4
+ROOT_PROBABILITY = 0.3
+MUTATIONS_PER_CYCLE = 3
+WALK_LENGTH = 4
+STEP_BUDGET_OBJECTS = 8  # objects scanned or swept per incremental slice
+STEP_BUDGET_US = None  # optional time budget per incremental slice, in microseconds
+NURSERY_FRACTION = 0.25
+TENURE_AGE = 2  # minor collections survived before promotion
+MAJOR_INTERVAL = 8  # every Nth collection is a major collection
+RC_DEFERRED = True  # do not count root references, check a zero count table instead
+RC_COALESCED = True  # log mutated objects and apply only net count changes per cycle
+CYCLE_COLLECT_INTERVAL = 4  # cycles between trial-deletion cycle collections
+
+
+def rng_stream(seed, name):
+    # Independent named streams, so changing how often one consumer draws leaves the others untouched.
+    return random.Random(None if seed is None else f"{seed}:{name}")
+
+class MemoryBlock:
+    # Mark bits live in the manager's ObjectTable rather than on the object.
+    __slots__ = ("size", "id", "start_index", "refs")
+
+    def __init__(self, size, id):
+        self.size = size
+        self.id = id
+        self.start_index = None
+        self.refs = new_refs()
+
+class GenerationalBlock(MemoryBlock):
+    __slots__ = ("age",)
+
+    def __init__(self, size, id):
+        super().__init__(size, id)
+        self.age = 0
+
+class CopyingBlock(MemoryBlock):
+    __slots__ = ("forwarded",)
+
+    def __init__(self, size, id):
+        super().__init__(size, id)
+        self.forwarded = 0  # epoch of the last copy; while equal to the manager's, start_index is the forwarding address
+
+class RefCountedObject:
+    __slots__ = ("size", "id", "ref_count", "start_index", "refs", "color", "buffered")
+
+    def __init__(self, size, id):
+        self.size = size
+        self.id = id
+        self.ref_count = 0
+        self.start_index = None
+        self.refs = new_refs()
+        self.color = None
+        self.buffered = False
+
+class MemoryManager:
+    def __init__(self, total_memory, allocator=ALLOCATOR, layout_mode=LAYOUT_MODE, root_set_size=ROOT_SET_SIZE, object_range=OBJECT_RANGE, seed=None, recorder=None, replay=None, instruments=None,
+                 compactor=COMPACTOR, compact_threshold=COMPACT_THRESHOLD, mark_workers=MARK_WORKERS, mark_mode=MARK_MODE, map_dir=MAP_DIR, workload=WORKLOAD):
+        self.total_memory = total_memory
+        self.object_range = object_range
+        self.seed = seed
+        self.size_rng = rng_stream(seed, "sizes")
+        self.mutator_rng = rng_stream(seed, "mutator")
+        self.workload = make_workload(workload) if isinstance(workload, str) else workload
+        if self.workload is not None:
+            self.workload.attach(self, np.random.default_rng(rng_stream(seed, "workload").getrandbits(64)))
+        self.recorder = recorder
+        self.replay = replay
+        self.root_set_size = root_set_size
+        self.roots = []
+        self.pinned = set()  # roots held by a workload's lifetime model, which the random mutator leaves alone
+        self.heap = make_heap(layout_mode, total_memory, make_allocator(allocator, total_memory), map_dir)
+        self.allocator = self.heap.allocator
+        self.compactor = make_compactor(compactor)
+        self.compact_threshold = compact_threshold
+        self.compactions = 0
+        self.cells_moved = 0
+        self.mark_workers = mark_workers
+        self.mark_mode = mark_mode
+        self.instruments = instruments if instruments is not None else Instrumentation()
+        self.instruments.attach(self.heap)
+        self.memory = []
+        self.allocated_memory = MappedObjectTable(map_dir) if self.heap.mapped else ObjectTable()
+        self.metrics = MetricsStore()
+        self.memory_usage = self.metrics.series("used_memory")
+        self.benchmark_times = self.metrics.series("gc_time")
+        self.pause_times = self.metrics.series("pause")
+        self.cycle_gc_time = 0.0  # collection pauses so far this cycle, including those run inside allocate()
+        self.pending_collected = 0  # objects freed by collections run inside allocate() since the last cycle
+        self.layout_snapshots = True  # off when a reader follows the heap's change log instead
+
+    @property
+    def memory_layout(self):
+        return self.heap.render()
+
+    def layout(self):
+        return self.heap.snapshot() if self.layout_snapshots else None
+
+    def new_object(self, size, id):
+        return MemoryBlock(size, id)
+
+    def place(self, obj_id, size):
+        return self.heap.place(obj_id, size)
+
+    def collect_for_space(self):
+        # Collectors that collect when an allocation does not fit override this to collect and return
+        # how many objects were freed; None leaves the allocation failed.
+        return None
+
+    def add_object(self, obj):
+        self.memory.append(obj)
+
+    def allocate(self, size=None):
+        if size is None:
+            size = self.size_rng.randint(*self.object_range)
+        obj_id = self.allocated_memory.next_id()
+        start = self.place(obj_id, size)
+        if start is None:
+            collected = self.collect_for_space()
+            if collected is not None:
+                self.pending_collected += collected
+                # The collection may have freed ids, and the next one to hand out with them.
+                obj_id = self.allocated_memory.next_id()
+                start = self.place(obj_id, size)
+        obj = None
+        if start is not None:
+            obj = self.new_object(size, obj_id)
+            obj.start_index = start
+            self.add_object(obj)
+            self.allocated_memory.add(obj)
+        if self.recorder is not None:
+            self.recorder.allocation(obj, size)
+        return obj
+
+    def find_space(self, size):
+        return self.heap.find(size)
+
+    def get_used_memory(self):
+        return sum(obj.size for obj in self.memory)
+
+    def add_root(self, obj):
+        self.roots.append(obj.id)
+        if self.recorder is not None:
+            self.recorder.root_added(obj)
+
+    def remove_root(self, index):
+        obj_id = self.roots.pop(index)
+        if self.recorder is not None:
+            self.recorder.root_removed(obj_id, index)
+        return obj_id
+
+    def add_ref(self, src, dst):
+        src.refs.append(dst.id)
+        if self.recorder is not None:
+            self.recorder.ref_added(src, dst.id)
+
+    def remove_ref(self, src, index):
+        obj_id = src.refs.pop(index)
+        if self.recorder is not None:
+            self.recorder.ref_removed(src, obj_id)
+        return obj_id
+
+    def reachable_object(self):
+        if not self.roots:
+            return None
+        rng = self.mutator_rng
+        obj = self.allocated_memory[rng.choice(self.roots)]
+        for _ in range(rng.randint(0, WALK_LENGTH)):
+            if not obj.refs:
+                break
+            obj = self.allocated_memory[rng.choice(obj.refs)]
+        return obj
+
+    def link(self, obj):
+        rng = self.mutator_rng
+        parent = self.reachable_object()
+        if parent is None or rng.random() < ROOT_PROBABILITY:
+            self.add_root(obj)
+            if len(self.roots) - len(self.pinned) > self.root_set_size:
+                self.remove_root(next(i for i, root in enumerate(self.roots) if root not in self.pinned))
+        else:
+            if len(parent.refs) >= MAX_REFS:
+                self.remove_ref(parent, rng.randrange(len(parent.refs)))
+            self.add_ref(parent, obj)
+
+    def mutate(self):
+        if self.replay is not None:
+            self.replay.apply_slice(self)
+            return
+        rng = self.mutator_rng
+        for _ in range(MUTATIONS_PER_CYCLE):
+            src = self.reachable_object()
+            if src is None:
+                break
+            op = rng.random()
+            if op < 0.5:
+                if len(src.refs) >= MAX_REFS:
+                    self.remove_ref(src, rng.randrange(len(src.refs)))
+                self.add_ref(src, self.reachable_object())
+            elif op < 0.9:
+                if src.refs:
+                    self.remove_ref(src, rng.randrange(len(src.refs)))
+            elif self.roots:
+                index = rng.randrange(len(self.roots))
+                if self.roots[index] not in self.pinned:
+                    self.remove_root(index)
+        if self.recorder is not None:
+            self.recorder.end_slice()
+
+    def run_mutator(self):
+        if self.replay is None and self.workload is not None:
+            self.workload.run(self)
+        elif self.replay is None:
+            obj = self.allocate()
+            if obj is not None:
+                self.link(obj)
+        self.mutate()
+
+    def end_cycle(self):
+        self.instruments.end_cycle()
+        if self.recorder is not None:
+            self.recorder.end_cycle()
+        if self.replay is not None:
+            self.replay.finish_cycle(self)
+
+    def mark(self):
+        objects = self.allocated_memory
+        if not self.mark_workers:
+            return mark_from_roots(self.roots, objects, objects.clear_marks())
+        indptr, indices = to_csr(objects, len(objects))
+        marked = parallel_mark(indptr, indices, self.roots, len(objects), self.mark_workers, self.mark_mode)
+        objects.set_marks(marked)
+        return int(marked.sum())
+
+    def free_object(self, obj):
+        self.heap.free(obj.start_index)
+        obj.start_index = None
+        del obj.refs[:]
+        self.allocated_memory.release(obj.id)
+
+    def address_order(self, objects):
+        # A mapped heap is swept in address order, so the cells it frees are written sequentially.
+        if self.heap.mapped:
+            objects.sort(key=lambda obj: obj.start_index)
+        return objects
+
+    def sweep(self):
+        before = len(self.memory)
+        marks = self.allocated_memory.marks
+        survivors = []
+        for obj in self.address_order(self.memory):
+            if marks[obj.id]:
+                survivors.append(obj)
+            else:
+                self.free_object(obj)
+        self.memory = survivors
+        return before - len(self.memory)
+
+    def needs_compaction(self):
+        return self.heap.fragmentation() > self.compact_threshold
+
+    def compact(self, objects=None, base=0):
+        moved = self.compactor(self.heap, self.memory if objects is None else objects, base)
+        self.compactions += 1
+        self.count_moved(moved)
+        return moved
+
+    def count_moved(self, cells):
+        self.cells_moved += cells
+        self.instruments.count("cells_moved", cells)
+
+    def maybe_compact(self, objects=None, base=0):
+        if self.needs_compaction():
+            return self.compact(objects, base)
+        return 0
+
+    def record_pause(self, pause):
+        self.pause_times.append(pause)
+        self.cycle_gc_time += pause
+
+    def pause_stats(self):
+        if not self.pause_times:
+            return 0.0, 0.0
+        return self.pause_times.max, self.pause_times.quantile(0.99)
+
+    def collect(self):
+        instruments = self.instruments
+        start_time = perf_counter()
+        with instruments.phase("mark"):
+            instruments.count("objects_visited", self.mark() + len(self.memory))
+        with instruments.phase("sweep"):
+            collected = self.sweep()
+        with instruments.phase("compact"):
+            self.maybe_compact()
+        self.record_pause(perf_counter() - start_time)
+        return collected
+
+    def simulate_cycle(self):
+        # A cycle's GC time is its collection pauses alone, so it compares across collectors whether
+        # they collect after the mutator, in slices between its steps or inside allocate().
+        self.cycle_gc_time = 0.0
+        with self.instruments.phase("mutator"):
+            self.run_mutator()
+        collected = self.collect()
+        used = self.get_used_memory()
+        self.memory_usage.append(used)
+        self.benchmark_times.append(self.cycle_gc_time)
+        self.end_cycle()
+        return collected, used, self.layout()
+
+class IncrementalMarkSweepManager(MemoryManager):
+    def __init__(self, total_memory, budget_objects=STEP_BUDGET_OBJECTS, budget_us=STEP_BUDGET_US, **kwargs):
+        super().__init__(total_memory, **kwargs)
+        self.budget = Budget(budget_objects, budget_us)
+        self.marker = TriColorMarker(self.allocated_memory)
+        self.phase = IDLE
+        self.sweep_list = []
+        self.sweep_index = 0
+        self.collected = 0
+
+    def allocate(self, size=None):
+        obj = super().allocate(size)
+        if obj is not None:
+            self.marker.allocate_black(obj)
+        return obj
+
+    def add_ref(self, src, dst):
+        super().add_ref(src, dst)
+        if self.phase == MARK:
+            self.marker.write_barrier(dst)
+
+    def begin_cycle(self):
+        with self.instruments.phase("mutator"):
+            self.run_mutator()
+        self.start_marking()
+
+    def start_marking(self):
+        self.collected = 0
+        self.cycle_gc_time = 0.0
+        self.marker.start(self.roots)
+        self.phase = MARK
+
+    def sweep_step(self):
+        marker = self.marker
+        while self.sweep_index < len(self.sweep_list):
+            obj = self.sweep_list[self.sweep_index]
+            self.sweep_index += 1
+            if marker.is_black_or_grey(obj):
+                self.memory.append(obj)
+            else:
+                self.free_object(obj)
+                self.collected += 1
+            if not self.budget.spend():
+                break
+        return self.sweep_index == len(self.sweep_list)
+
+    def collect_slice(self):
+        instruments = self.instruments
+        start_time = perf_counter()
+        self.budget.start()
+        if self.phase == MARK:
+            with instruments.phase("mark"):
+                if self.marker.step(self.budget):
+                    self.phase = SWEEP
+                    self.sweep_list, self.memory = self.address_order(self.memory), []
+                    self.sweep_index = 0
+        if self.phase == SWEEP:
+            with instruments.phase("sweep"):
+                if self.sweep_step():
+                    # Compaction is not divisible by the budget, so it gets a slice of its own.
+                    self.phase = COMPACT if self.needs_compaction() else IDLE
+                    self.sweep_list = []
+        elif self.phase == COMPACT:
+            with instruments.phase("compact"):
+                self.compact()
+            self.phase = IDLE
+        instruments.count("objects_visited", self.budget.used)
+        pause = perf_counter() - start_time
+        self.record_pause(pause)
+
+    def collect(self):
+        # A whole cycle's slices back to back, without mutator work in between.
+        self.start_marking()
+        while self.phase != IDLE:
+            self.collect_slice()
+        return self.collected
+
+    def step(self):
+        if self.phase == IDLE:
+            self.begin_cycle()
+        else:
+            with self.instruments.phase("mutator"):
+                self.mutate()
+        self.collect_slice()
+        if self.phase != IDLE:
+            return None
+        used = self.get_used_memory()
+        self.memory_usage.append(used)
+        self.benchmark_times.append(self.cycle_gc_time)
+        self.end_cycle()
+        return self.collected, used, self.layout()
+
+    def simulate_cycle(self):
+        result = self.step()
+        while result is None:
+            result = self.step()
+        return result
+
+class AllocationTriggeredManager(MemoryManager):
+    # Collects inside allocate(), through collect_for_space(), when an allocation does not fit rather
+    # than once a cycle; collect() reports what those collections freed since the last cycle.
+    def collect(self):
+        collected, self.pending_collected = self.pending_collected, 0
+        return collected
+
+class GenerationalGCManager(AllocationTriggeredManager):
+    def __init__(self, total_memory, nursery_size=None, tenure_age=TENURE_AGE, major_interval=MAJOR_INTERVAL, **kwargs):
+        super().__init__(total_memory, **kwargs)
+        if nursery_size is None:
+            nursery_size = int(total_memory * NURSERY_FRACTION)
+        self.nursery_size = nursery_size
+        self.heap.reserve_prefix(nursery_size)
+        self.tenure_age = tenure_age
+        self.major_interval = major_interval
+        self.top = 0
+        self.remembered = set()
+        self.collections = 0
+        self.major_pending = False
+        self.minor_times = self.metrics.series("minor_pause")
+        self.major_times = self.metrics.series("major_pause")
+
+    @property
+    def memory(self):
+        return self.old + self.young
+
+    @memory.setter
+    def memory(self, objects):
+        self.old = list(objects)
+        self.young = []
+
+    def new_object(self, size, id):
+        return GenerationalBlock(size, id)
+
+    def is_young(self, obj):
+        return obj.start_index < self.nursery_size
+
+    def place(self, obj_id, size):
+        if size > self.nursery_size:
+            return self.heap.place(obj_id, size)
+        if self.top + size > self.nursery_size:
+            return None
+        start = self.top
+        self.heap.track(obj_id, start, size)
+        self.top += size
+        return start
+
+    def collect_for_space(self):
+        return self.collect_generation()
+
+    def add_object(self, obj):
+        (self.young if self.is_young(obj) else self.old).append(obj)
+
+    def add_ref(self, src, dst):
+        super().add_ref(src, dst)
+        if self.is_young(dst) and not self.is_young(src):
+            self.remembered.add(src.id)
+
+    def get_used_memory(self):
+        return self.top + sum(obj.size for obj in self.old)
+
+    def points_young(self, obj):
+        objects = self.allocated_memory
+        return any(self.is_young(objects[ref]) for ref in obj.refs)
+
+    def mark_young(self):
+        objects = self.allocated_memory
+        marks = objects.clear_marks()
+        is_young = self.is_young
+        stack = [objects[root] for root in self.roots if is_young(objects[root])]
+        for src_id in self.remembered:
+            stack.extend(objects[ref] for ref in objects[src_id].refs if is_young(objects[ref]))
+        visited = 0
+        while stack:
+            obj = stack.pop()
+            if marks[obj.id]:
+                continue
+            marks[obj.id] = 1
+            visited += 1
+            for ref in obj.refs:
+                if not marks[ref] and is_young(objects[ref]):
+                    stack.append(objects[ref])
+        return visited
+
+    def evacuate_nursery(self):
+        objects = self.allocated_memory
+        marks = objects.marks
+        collected = 0
+        survivors = []
+        for obj in self.young:
+            self.heap.untrack(obj.start_index)
+            if marks[obj.id]:
+                survivors.append(obj)
+            else:
+                obj.start_index = None
+                del obj.refs[:]
+                objects.release(obj.id)
+                collected += 1
+        self.young = []
+        self.top = 0
+        promoted = []
+        moved = 0
+        for obj in survivors:
+            obj.age += 1
+            start = self.heap.place(obj.id, obj.size) if obj.age >= self.tenure_age else None
+            if start is not None:
+                obj.start_index = start
+                self.old.append(obj)
+                promoted.append(obj)
+                moved += obj.size
+                continue
+            if obj.age >= self.tenure_age:
+                self.major_pending = True
+            if obj.start_index != self.top:
+                obj.start_index = self.top
+                moved += obj.size
+            self.heap.track(obj.id, self.top, obj.size)
+            self.top += obj.size
+            self.young.append(obj)
+        self.count_moved(moved)
+        return collected, promoted
+
+    def minor_collect(self):
+        instruments = self.instruments
+        with instruments.phase("mark"):
+            instruments.count("objects_visited", self.mark_young() + len(self.young))
+        with instruments.phase("sweep"):
+            collected, promoted = self.evacuate_nursery()
+        objects = self.allocated_memory
+        candidates = [objects[src_id] for src_id in self.remembered] + promoted
+        self.remembered = {obj.id for obj in candidates if self.points_young(obj)}
+        return collected
+
+    def compact_old(self):
+        return self.maybe_compact(self.old, self.nursery_size)
+
+    def major_collect(self):
+        instruments = self.instruments
+        with instruments.phase("mark"):
+            instruments.count("objects_visited", self.mark() + len(self.old) + len(self.young))
+        with instruments.phase("sweep"):
+            collected = 0
+            survivors = []
+            marks = self.allocated_memory.marks
+            for obj in self.address_order(self.old):
+                if marks[obj.id]:
+                    survivors.append(obj)
+                else:
+                    self.free_object(obj)
+                    collected += 1
+            self.old = survivors
+        with instruments.phase("compact"):
+            self.compact_old()
+        self.major_pending = False
+        with instruments.phase("sweep"):
+            young_collected, _ = self.evacuate_nursery()
+        self.remembered = {obj.id for obj in self.old if self.points_young(obj)}
+        return collected + young_collected
+
+    def collect_generation(self):
+        self.collections += 1
+        major = self.major_pending or self.collections % self.major_interval == 0
+        start_time = perf_counter()
+        collected = self.major_collect() if major else self.minor_collect()
+        pause = perf_counter() - start_time
+        (self.major_times if major else self.minor_times).append(pause)
+        self.record_pause(pause)
+        return collected
+
+class SemiSpaceGCManager(AllocationTriggeredManager):
+    # Cheney copying collector: allocation bumps a pointer through the active half of the heap, and a
+    # flip copies the objects reachable from the roots breadth first into the other half, using the
+    # copied objects themselves as the scan queue. Dead objects in the abandoned half are never traced;
+    # the flip only hands their ids back to the object table.
+    def __init__(self, total_memory, **kwargs):
+        super().__init__(total_memory, **kwargs)
+        self.semispace_size = total_memory // 2
+        self.space_base = 0
+        self.top = 0
+        self.epoch = 0
+        self.flips = 0
+        self.heap.free_index.take(self.semispace_size, total_memory - self.semispace_size)
+
+    def new_object(self, size, id):
+        obj = CopyingBlock(size, id)
+        obj.forwarded = self.epoch
+        return obj
+
+    def place(self, obj_id, size):
+        # Bumps a pointer through the active half.
+        if self.top + size > self.space_base + self.semispace_size:
+            return None
+        start = self.top
+        self.heap.place_at(obj_id, start, size)
+        self.top += size
+        return start
+
+    def collect_for_space(self):
+        return self.flip()
+
+    def get_used_memory(self):
+        return self.top - self.space_base
+
+    def forward(self, obj, copied):
+        if obj.forwarded != self.epoch:
+            if self.top + obj.size > self.space_base + self.semispace_size:
+                raise MemoryError(f"Live data exceeds the {self.semispace_size}-cell semi-space")
+            obj.forwarded = self.epoch
+            obj.start_index = self.top
+            self.heap.place_at(obj.id, self.top, obj.size)
+            self.top += obj.size
+            copied.append(obj)
+
+    def flip(self):
+        instruments = self.instruments
+        start_time = perf_counter()
+        with instruments.phase("copy"):
+            objects = self.allocated_memory
+            free = self.heap.free_index
+            from_base, to_base = self.space_base, self.semispace_size - self.space_base
+            from_limit = from_base + self.semispace_size
+            if self.top < from_limit:
+                free.take(self.top, from_limit - self.top)
+            free.release(to_base, self.semispace_size)
+            self.epoch += 1
+            self.space_base = self.top = to_base
+            copied = []
+            for root in self.roots:
+                self.forward(objects[root], copied)
+            scan = 0
+            while scan < len(copied):
+                obj = copied[scan]
+                scan += 1
+                for ref in obj.refs:
+                    self.forward(objects[ref], copied)
+            self.heap.forget_range(from_base, from_limit)
+            for obj in self.memory:
+                if obj.forwarded != self.epoch:
+                    obj.start_index = None
+                    objects.release(obj.id)
+            collected = len(self.memory) - len(copied)
+            self.memory = copied
+            self.flips += 1
+        instruments.count("objects_visited", len(copied))
+        self.count_moved(self.top - self.space_base)
+        self.record_pause(perf_counter() - start_time)
+        return collected
+
+class GCManagerWithReferenceCounting(MemoryManager):
+    def __init__(self, total_memory, deferred=RC_DEFERRED, coalesced=RC_COALESCED, cycle_interval=CYCLE_COLLECT_INTERVAL, **kwargs):
+        super().__init__(total_memory, **kwargs)
+        self.engine = RefCountEngine(self.allocated_memory, self.free_object, self.is_rooted, deferred, coalesced)
+        self.cycle_interval = cycle_interval
+        self.cycles = 0
+        self.reported_freed = 0
+
+    def new_object(self, size, id):
+        obj = RefCountedObject(size, id)
+        self.engine.on_new(obj)
+        return obj
+
+    def is_rooted(self, obj):
+        return obj.id in self.roots
+
+    def add_root(self, obj):
+        super().add_root(obj)
+        self.engine.root_added(obj)
+
+    def remove_root(self, index):
+        obj_id = super().remove_root(index)
+        self.engine.root_removed(self.allocated_memory[obj_id])
+        return obj_id
+
+    def add_ref(self, src, dst):
+        self.engine.before_write(src)
+        super().add_ref(src, dst)
+        self.engine.after_write(None, dst)
+
+    def remove_ref(self, src, index):
+        self.engine.before_write(src)
+        obj_id = super().remove_ref(src, index)
+        self.engine.after_write(self.allocated_memory[obj_id], None)
+        return obj_id
+
+    def collect(self):
+        start_time = perf_counter()
+        collected = self.collect_garbage()
+        with self.instruments.phase("compact"):
+            self.maybe_compact()
+        self.record_pause(perf_counter() - start_time)
+        return collected
+
+    def collect_garbage(self):
+        instruments = self.instruments
+        with instruments.phase("refcount"):
+            self.engine.collect()
+        self.cycles += 1
+        if self.cycles % self.cycle_interval == 0:
+            with instruments.phase("cycle_collect"):
+                self.engine.collect_cycles()
+        collected = self.engine.freed - self.reported_freed
+        self.reported_freed = self.engine.freed
+        if collected:
+            self.memory = [obj for obj in self.memory if obj.start_index is not None]
+        return collected
+
+ALGORITHMS = {
+    "Mark and Sweep": MemoryManager,
+    "Incremental Mark and Sweep": IncrementalMarkSweepManager,
+    "Generational": GenerationalGCManager,
+    "Semi-Space Copying": SemiSpaceGCManager,
+    "Reference Counting": GCManagerWithReferenceCounting,
+}
+
+
+def algorithm_key(name):
+    return name.lower().replace(" ", "-")
+
+
+def make_manager(algorithm, total_memory=MEMORY_SIZE, **kwargs):
+    for name, cls in ALGORITHMS.items():
+        if algorithm in (name, algorithm_key(name)):
+            return cls(total_memory, **kwargs)
+    raise ValueError(f"Unknown algorithm '{algorithm}', choose from {', '.join(algorithm_key(name) for name in ALGORITHMS)}")
@@ -0,0 +1,221 @@
+import csv
+import os
+import shutil
+import struct
+import tempfile
+import zipfile
+
+import numpy as np
+
+try:
+    import pyarrow
+    import pyarrow.parquet
+except ImportError:
+    pyarrow = None
+
+BATCH = 4096  # records buffered before a write
+
+
+def cycle_record(cycle, used, collected, gc_time, stats):
+    record = {"cycle": cycle, "used_memory": used, "collected": collected, "gc_time": gc_time}
+    record.update((f"{name}_ns", ns) for name, ns in stats.phases.items())
+    record.update(stats.counters)
+    if stats.fragmentation is not None:
+        record.update(stats.fragmentation)
+    if stats.memory is not None:
+        record["traced_bytes"], record["traced_peak_bytes"] = stats.memory
+    return record
+
+
+def flatten(record):
+    # Columnar formats get one column per histogram size class instead of a list.
+    row = {}
+    for key, value in record.items():
+        if isinstance(value, list):
+            row.update((f"{key}_{i}", item) for i, item in enumerate(value))
+        else:
+            row[key] = value
+    return row
+
+
+def columns_dtype(row):
+    return np.dtype([(name, np.float64 if isinstance(value, float) else np.int64) for name, value in row.items()])
+
+
+class NpyStream:
+    # Appends rows to a .npy file whose header is written with room for any row count and patched
+    # with the real one on close, so the array never has to be held in memory.
+    def __init__(self, path, dtype):
+        self.path = path
+        self.dtype = dtype
+        self.rows = 0
+        # Sized for the widest row count and rounded up to the 64-byte alignment the format expects.
+        self.size = -(-(len(self.header_text(2 ** 63)) + 11) // 64) * 64
+        self.file = open(path, mode='wb')
+        self.file.write(self.header(0))
+
+    def header_text(self, rows):
+        return repr({"descr": np.lib.format.dtype_to_descr(self.dtype), "fortran_order": False, "shape": (rows,)})
+
+    def header(self, rows):
+        text = self.header_text(rows).ljust(self.size - 11) + "\n"
+        return b"\x93NUMPY\x01\x00" + struct.pack("<H", self.size - 10) + text.encode("latin1")
+
+    def write(self, array):
+        self.file.write(np.ascontiguousarray(array, dtype=self.dtype).tobytes())
+        self.rows += len(array)
+
+    def close(self):
+        self.file.seek(0)
+        self.file.write(self.header(self.rows))
+        self.file.close()
+
+
+class Exporter:
+    # Buffers records and writes them BATCH at a time; close() flushes the rest.
+    def __init__(self, path, batch=BATCH):
+        self.path = path
+        self.batch = batch
+        self.buffer = []
+        self.count = 0
+
+    def append(self, record):
+        self.buffer.append(record)
+        self.count += 1
+        if len(self.buffer) >= self.batch:
+            self.flush()
+
+    def flush(self):
+        if self.buffer:
+            self.write_batch(self.buffer)
+            self.buffer = []
+
+    def write_batch(self, records):
+        raise NotImplementedError
+
+    def close(self):
+        self.flush()
+        self.finish()
+
+    def finish(self):
+        pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+class CsvExporter(Exporter):
+    def __init__(self, path, batch=BATCH):
+        super().__init__(path, batch)
+        self.file = open(path, mode='w', newline='')
+        self.writer = None
+
+    def write_batch(self, records):
+        if self.writer is None:
+            self.writer = csv.DictWriter(self.file, fieldnames=list(records[0]), extrasaction='ignore', restval=0)
+            self.writer.writeheader()
+        self.writer.writerows({key: " ".join(map(str, value)) if isinstance(value, list) else value for key, value in record.items()} for record in records)
+        self.file.flush()
+
+    def finish(self):
+        self.file.close()
+
+
+class ColumnarExporter(Exporter):
+    # Columns and their types are fixed by the first record.
+    def __init__(self, path, batch=BATCH):
+        super().__init__(path, batch)
+        self.dtype = None
+
+    def to_array(self, records):
+        rows = [flatten(record) for record in records]
+        if self.dtype is None:
+            self.dtype = columns_dtype(rows[0])
+            self.start(self.dtype)
+        names = self.dtype.names
+        return np.array([tuple(row.get(name, 0) for name in names) for row in rows], dtype=self.dtype)
+
+    def start(self, dtype):
+        pass
+
+    def finish(self):
+        if self.dtype is None:
+            # No records: an empty array with only the cycle column.
+            self.dtype = np.dtype([("cycle", np.int64)])
+            self.start(self.dtype)
+
+
+class NpyExporter(ColumnarExporter):
+    # One structured array; np.load(path)["used_memory"] gives a column.
+    def start(self, dtype):
+        self.stream = NpyStream(self.path, dtype)
+
+    def write_batch(self, records):
+        array = self.to_array(records)
+        self.stream.write(array)
+
+    def finish(self):
+        super().finish()
+        self.stream.close()
+
+
+class NpzExporter(ColumnarExporter):
+    # One array per column. Columns are streamed into .npy files in a scratch directory and zipped
+    # into the archive on close.
+    def start(self, dtype):
+        self.scratch = tempfile.mkdtemp(prefix="gc_export_", dir=os.path.dirname(os.path.abspath(self.path)))
+        self.streams = {name: NpyStream(os.path.join(self.scratch, f"{name}.npy"), dtype[name]) for name in dtype.names}
+
+    def write_batch(self, records):
+        array = self.to_array(records)
+        for name, stream in self.streams.items():
+            stream.write(array[name])
+
+    def finish(self):
+        super().finish()
+        try:
+            with zipfile.ZipFile(self.path, mode='w', allowZip64=True) as archive:
+                for name, stream in self.streams.items():
+                    stream.close()
+                    archive.write(stream.path, arcname=f"{name}.npy")
+        finally:
+            shutil.rmtree(self.scratch, ignore_errors=True)
+
+
+class ParquetExporter(ColumnarExporter):
+    # One row group per batch.
+    def start(self, dtype):
+        self.writer = None
+
+    def write_batch(self, records):
+        array = self.to_array(records)
+        table = pyarrow.table({name: array[name] for name in array.dtype.names})
+        if self.writer is None:
+            self.writer = pyarrow.parquet.ParquetWriter(self.path, table.schema)
+        self.writer.write_table(table)
+
+    def finish(self):
+        super().finish()
+        if self.writer is None:
+            self.writer = pyarrow.parquet.ParquetWriter(self.path, pyarrow.schema([("cycle", pyarrow.int64())]))
+        self.writer.close()
+
+
+EXPORTERS = {".csv": CsvExporter, ".npy": NpyExporter, ".npz": NpzExporter, ".parquet": ParquetExporter}
+
+
+def check_export_path(path):
+    # Raises ValueError for a format that is unknown or whose library is missing, before any file is opened.
+    extension = os.path.splitext(path)[1].lower()
+    if extension not in EXPORTERS:
+        raise ValueError(f"Unknown export format '{extension}', choose from {', '.join(EXPORTERS)}")
+    if extension == ".parquet" and pyarrow is None:
+        raise ValueError("Parquet export needs pyarrow; install it or use .npz")
+    return extension
+
+
+def make_exporter(path, batch=BATCH):
+    return EXPORTERS[check_export_path(path)](path, batch)
@@ -0,0 +1,124 @@
+import queue
+import threading
+from time import perf_counter
+
+QUEUE_SIZE = 64  # cycle updates buffered between the simulation thread and its reader
+
+
+class CycleUpdate:
+    def __init__(self, cycle, collected, used, changes, stats, summary):
+        self.cycle = cycle
+        self.collected = collected
+        self.used = used
+        self.changes = changes  # heap extents added and removed during the cycle, see ExtentHeap.record_changes
+        self.stats = stats  # the cycle's CycleStats
+        self.summary = summary  # whatever the runner's summarize callback built from the manager
+
+
+class SimulationRunner(threading.Thread):
+    # Runs a manager's cycles off the GUI thread and publishes one CycleUpdate per cycle on a bounded
+    # queue; when the reader falls behind, the simulation waits rather than buffering without limit.
+    # The manager must not be touched from other threads while the runner is alive: everything a
+    # reader needs is copied into the updates, and summarize runs on the simulation thread.
+    def __init__(self, manager, cycles=None, cycles_per_second=None, summarize=None, queue_size=QUEUE_SIZE):
+        super().__init__(daemon=True)
+        self.manager = manager
+        self.cycles = cycles
+        self.summarize = summarize
+        self.updates = queue.Queue(maxsize=queue_size)
+        self.condition = threading.Condition()
+        self.interval = 0.0
+        self.paused = False
+        self.steps = 0
+        self.stopped = False
+        self.finished = False
+        self.error = None
+        self.cycle = 0
+        self.stats = None
+        self.set_speed(cycles_per_second)
+        manager.layout_snapshots = False
+        manager.heap.record_changes()
+        manager.instruments.subscribe(self.on_cycle_stats)
+
+    def on_cycle_stats(self, stats):
+        self.stats = stats
+
+    def set_speed(self, cycles_per_second):
+        # None or 0 runs cycles back to back.
+        with self.condition:
+            self.interval = 1.0 / cycles_per_second if cycles_per_second else 0.0
+            self.condition.notify_all()
+
+    def pause(self):
+        with self.condition:
+            self.paused = True
+
+    def resume(self):
+        with self.condition:
+            self.paused = False
+            self.condition.notify_all()
+
+    def step(self):
+        # Runs one cycle while paused.
+        with self.condition:
+            self.steps += 1
+            self.condition.notify_all()
+
+    def stop(self):
+        with self.condition:
+            self.stopped = True
+            self.condition.notify_all()
+
+    def wait_turn(self):
+        with self.condition:
+            while not self.stopped and self.paused and not self.steps:
+                self.condition.wait()
+            if self.paused and self.steps:
+                self.steps -= 1
+            return not self.stopped
+
+    def run_cycle(self):
+        manager = self.manager
+        collected, used, _ = manager.simulate_cycle()
+        self.cycle += 1
+        summary = self.summarize(manager) if self.summarize is not None else None
+        return CycleUpdate(self.cycle, collected, used, manager.heap.drain_changes(), self.stats, summary)
+
+    def publish(self, update):
+        while not self.stopped:
+            try:
+                self.updates.put(update, timeout=0.1)
+                return
+            except queue.Full:
+                continue
+
+    def run(self):
+        try:
+            while (self.cycles is None or self.cycle < self.cycles) and self.wait_turn():
+                start = perf_counter()
+                self.publish(self.run_cycle())
+                with self.condition:
+                    # Pause, stop and speed changes cut the wait short.
+                    while not self.stopped and not self.paused:
+                        remaining = start + self.interval - perf_counter()
+                        if remaining <= 0:
+                            break
+                        self.condition.wait(remaining)
+        except Exception as exc:
+            self.error = exc
+        finally:
+            self.finished = True
+            self.manager.instruments.unsubscribe(self.on_cycle_stats)
+
+    def drain(self, limit=None):
+        # Called by the reader: the updates published so far, oldest first.
+        updates = []
+        while limit is None or len(updates) < limit:
+            try:
+                updates.append(self.updates.get_nowait())
+            except queue.Empty:
+                break
+        return updates
+
+    def done(self):
+        return self.finished and self.updates.empty()
@@ -0,0 +1,128 @@
+import mmap
+import struct
+import zlib
+
+import numpy as np
+
+from heap import LayoutMirror
+
+MAGIC = b"GCSN"
+VERSION = 1
+HEADER = struct.Struct("<4sIQI")  # magic, version, total_memory, keyframe interval
+TRAILER = struct.Struct("<QQ")  # index offset, snapshot count
+KEYFRAME_INTERVAL = 64  # snapshots between full layouts
+COMPRESS_LEVEL = 1
+
+# Every snapshot stores the extents that changed since the previous one as (start, length, id) rows,
+# id -1 for a removal, exactly as ExtentHeap.drain_changes() reports them. Every KEYFRAME_INTERVAL-th
+# snapshot also stores the whole layout, so reading any snapshot decodes one keyframe and at most
+# KEYFRAME_INTERVAL - 1 deltas. Blocks are zlib-compressed; on disk they are followed by an index of
+# (delta offset, delta size, keyframe offset, keyframe size) per snapshot and a trailer.
+
+
+class SnapshotStore:
+    def __init__(self, total_memory, path=None, keyframe_interval=KEYFRAME_INTERVAL, level=COMPRESS_LEVEL):
+        self.total_memory = total_memory
+        self.path = path
+        self.keyframe_interval = keyframe_interval
+        self.level = level
+        self.dtype = np.dtype('<i4') if total_memory < 2 ** 31 else np.dtype('<i8')
+        self.index = []
+        self.latest = LayoutMirror(total_memory)  # the layout after the last append
+        self.cache = None  # (snapshot, mirror) of the last read
+        self.map = None
+        self.file = None
+        self.data = None
+        if path is None:
+            self.data = bytearray(HEADER.pack(MAGIC, VERSION, total_memory, keyframe_interval))
+            self.size = len(self.data)
+        else:
+            self.file = open(path, mode='w+b')
+            self.file.write(HEADER.pack(MAGIC, VERSION, total_memory, keyframe_interval))
+            self.size = HEADER.size
+
+    @classmethod
+    def open(cls, path):
+        # Reopens a closed store file read-only through a memory map.
+        store = cls.__new__(cls)
+        store.path = path
+        store.file = open(path, mode='rb')
+        store.map = mmap.mmap(store.file.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, version, store.total_memory, store.keyframe_interval = HEADER.unpack_from(store.map, 0)
+        if magic != MAGIC or version != VERSION:
+            raise ValueError(f"{path} is not a version {VERSION} layout snapshot store")
+        index_offset, count = TRAILER.unpack_from(store.map, len(store.map) - TRAILER.size)
+        store.index = [tuple(row) for row in np.frombuffer(store.map, dtype='<i8', count=count * 4, offset=index_offset).reshape(-1, 4).tolist()]
+        store.level = COMPRESS_LEVEL
+        store.dtype = np.dtype('<i4') if store.total_memory < 2 ** 31 else np.dtype('<i8')
+        store.latest = None
+        store.cache = None
+        store.data = None
+        store.size = index_offset
+        return store
+
+    def __len__(self):
+        return len(self.index)
+
+    def write(self, rows):
+        block = zlib.compress(np.asarray(rows, dtype=self.dtype).reshape(-1, 3).tobytes(), self.level)
+        offset = self.size
+        if self.data is not None:
+            self.data += block
+        else:
+            self.file.write(block)
+        self.size += len(block)
+        return offset, len(block)
+
+    def append(self, changes):
+        self.latest.apply(changes)
+        delta = self.write(changes)
+        keyframe = (-1, 0)
+        if len(self.index) % self.keyframe_interval == 0:
+            keyframe = self.write([(start, length, obj_id) for start, (length, obj_id) in self.latest.extents.items()])
+        self.index.append(delta + keyframe)
+
+    def read(self, offset, size):
+        if self.data is not None:
+            block = self.data[offset:offset + size]
+        else:
+            if self.map is None or offset + size > len(self.map):
+                self.file.flush()
+                if self.map is not None:
+                    self.map.close()
+                self.map = mmap.mmap(self.file.fileno(), 0, access=mmap.ACCESS_READ)
+            block = self.map[offset:offset + size]
+        return np.frombuffer(zlib.decompress(block), dtype=self.dtype).reshape(-1, 3)
+
+    def layout(self, snapshot):
+        if not 0 <= snapshot < len(self.index):
+            raise IndexError(f"Snapshot {snapshot} out of range 0..{len(self.index) - 1}")
+        keyframe = snapshot - snapshot % self.keyframe_interval
+        mirror = LayoutMirror(self.total_memory)
+        if self.cache is not None and keyframe <= self.cache[0] <= snapshot:
+            # Scrubbing forward from the last read only decodes the deltas in between.
+            first = self.cache[0] + 1
+            mirror.extents = dict(self.cache[1].extents)
+        else:
+            _, _, offset, size = self.index[keyframe]
+            mirror.apply(self.read(offset, size).tolist())
+            first = keyframe + 1
+        for i in range(first, snapshot + 1):
+            offset, size, _, _ = self.index[i]
+            mirror.apply(self.read(offset, size).tolist())
+        self.cache = (snapshot, mirror)
+        return mirror.snapshot()
+
+    def close(self):
+        if self.file is None:
+            return
+        if self.file.mode != 'rb':
+            index = np.array(self.index, dtype='<i8').reshape(-1, 4)
+            self.file.seek(self.size)
+            self.file.write(index.tobytes())
+            self.file.write(TRAILER.pack(self.size, len(self.index)))
+        if self.map is not None:
+            self.map.close()
+            self.map = None
+        self.file.close()
+        self.file = None
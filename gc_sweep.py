@@ -0,0 +1,145 @@
+import argparse
+import csv
+import itertools
+import json
+import os
+import statistics
+import zlib
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+from gc_engine import ALGORITHMS, OBJECT_RANGE, algorithm_key, make_manager
+from gc_cli import run_headless
+
+METRICS = ["wall_time", "avg_gc_time", "max_pause", "p99_pause", "total_collected", "final_used_memory"]
+CONFIG_FIELDS = ["algorithm", "memory", "object_range", "cycles"]
+
+
+def parse_range(text):
+    low, high = text.split(":")
+    return int(low), int(high)
+
+
+def run_key(config):
+    return "|".join(str(config[field]) for field in CONFIG_FIELDS + ["repeat"])
+
+
+def run_seed(base_seed, key):
+    return (base_seed * 1000003 + zlib.crc32(key.encode())) & 0xFFFFFFFF
+
+
+def build_grid(args):
+    grid = []
+    for algorithm, memory, object_range, cycles, repeat in itertools.product(args.algorithms, args.memory, args.object_ranges, args.cycles, range(args.repeats)):
+        config = {
+            "algorithm": algorithm,
+            "memory": memory,
+            "object_range": f"{object_range[0]}:{object_range[1]}",
+            "cycles": cycles,
+            "repeat": repeat,
+        }
+        config["key"] = run_key(config)
+        config["seed"] = run_seed(args.seed, config["key"])
+        grid.append(config)
+    return grid
+
+
+def run_one(config):
+    manager = make_manager(config["algorithm"], config["memory"], object_range=parse_range(config["object_range"]), seed=config["seed"])
+    _, summary = run_headless(manager, config["cycles"])
+    return {**config, **summary}
+
+
+def ensure_trailing_newline(path):
+    if os.path.exists(path) and os.path.getsize(path):
+        with open(path, 'rb+') as file:
+            file.seek(-1, os.SEEK_END)
+            if file.read(1) != b"\n":
+                file.write(b"\n")
+
+
+def load_completed(path):
+    completed = {}
+    if not os.path.exists(path):
+        return completed
+    with open(path) as file:
+        for line in file:
+            try:
+                result = json.loads(line)
+            except json.JSONDecodeError:
+                continue
+            completed[result["key"]] = result
+    return completed
+
+
+def aggregate(results):
+    groups = {}
+    for result in results:
+        groups.setdefault(tuple(result[field] for field in CONFIG_FIELDS), []).append(result)
+    rows = []
+    for group_key in sorted(groups):
+        runs = groups[group_key]
+        row = dict(zip(CONFIG_FIELDS, group_key))
+        row["runs"] = len(runs)
+        for metric in METRICS:
+            values = [run[metric] for run in runs]
+            row[f"{metric}_mean"] = statistics.fmean(values)
+            row[f"{metric}_std"] = statistics.stdev(values) if len(values) > 1 else 0.0
+        rows.append(row)
+    return rows
+
+
+def write_table(path, rows):
+    if not rows:
+        return
+    with open(path, mode='w', newline='') as file:
+        writer = csv.DictWriter(file, fieldnames=list(rows[0]))
+        writer.writeheader()
+        writer.writerows(rows)
+
+
+def print_table(rows):
+    print(f"{'algorithm':<28}{'memory':>10}{'range':>10}{'cycles':>8}{'runs':>6}{'avg GC (ms)':>14}{'p99 (ms)':>12}{'used':>10}")
+    for row in rows:
+        print(f"{row['algorithm']:<28}{row['memory']:>10}{row['object_range']:>10}{row['cycles']:>8}{row['runs']:>6}"
+              f"{row['avg_gc_time_mean'] * 1000:>14.4f}{row['p99_pause_mean'] * 1000:>12.4f}{row['final_used_memory_mean']:>10.1f}")
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(description="Run a resumable parameter sweep of GC simulations over a process pool")
+    parser.add_argument("--algorithms", nargs="+", default=[algorithm_key(name) for name in ALGORITHMS], choices=[algorithm_key(name) for name in ALGORITHMS])
+    parser.add_argument("--memory", type=int, nargs="+", default=[1000, 10000])
+    parser.add_argument("--object-ranges", type=parse_range, nargs="+", default=[OBJECT_RANGE], metavar="MIN:MAX")
+    parser.add_argument("--cycles", type=int, nargs="+", default=[1000])
+    parser.add_argument("--repeats", type=int, default=3)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--workers", type=int, default=os.cpu_count())
+    parser.add_argument("--output", default="sweep_results.jsonl", help="per-run results, appended as they finish; existing runs are skipped")
+    parser.add_argument("--table", default="sweep_summary.csv", help="aggregated table written at the end")
+    return parser
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    grid = build_grid(args)
+    completed = load_completed(args.output)
+    pending = [config for config in grid if config["key"] not in completed]
+    print(f"{len(grid)} runs in sweep, {len(grid) - len(pending)} already done, {len(pending)} to run")
+    ensure_trailing_newline(args.output)
+
+    with open(args.output, mode='a') as out, ProcessPoolExecutor(max_workers=args.workers) as pool:
+        futures = [pool.submit(run_one, config) for config in pending]
+        for done, future in enumerate(as_completed(futures), start=1):
+            result = future.result()
+            completed[result["key"]] = result
+            out.write(json.dumps(result) + "\n")
+            out.flush()
+            print(f"[{done}/{len(pending)}] {result['key']}: avg GC {result['avg_gc_time'] * 1000:.4f} ms")
+
+    keys = {config["key"] for config in grid}
+    rows = aggregate(result for key, result in completed.items() if key in keys)
+    write_table(args.table, rows)
+    print_table(rows)
+
+
+if __name__ == "__main__":
+    main()
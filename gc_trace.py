@@ -0,0 +1,168 @@
+import struct
+import sys
+from array import array
+
+import numpy as np
+
+MAGIC = b"GCTR"
+VERSION = 2
+HEADER = struct.Struct("<4sI")
+FLUSH_EVENTS = 1 << 16
+READ_CHUNK = 1 << 18
+
+# Each event is three little-endian uint32 words: opcode, a, b. Objects are named by allocation serial.
+# SLICE ends one call of the mutator, CYCLE ends a collection cycle. Removals name the root or the
+# referenced object rather than a list position, so they still find their target when a replaying
+# collector failed an allocation the recorded one made.
+ALLOC, ROOT_ADD, ROOT_REMOVE, REF_ADD, REF_REMOVE, SLICE, CYCLE = range(1, 8)
+
+
+class TraceWriter:
+    def __init__(self, path):
+        self.file = open(path, 'wb')
+        self.file.write(HEADER.pack(MAGIC, VERSION))
+        self.buffer = array('I')
+        self.serials = {}
+        self.next_serial = 0
+        self.cycles = 0
+        self.events = 0
+
+    def emit(self, op, a, b=0):
+        self.buffer.extend((op, a, b))
+        self.events += 1
+        if len(self.buffer) >= FLUSH_EVENTS * 3:
+            self.flush()
+
+    def allocation(self, obj, size):
+        serial = self.next_serial
+        self.next_serial += 1
+        if obj is not None:
+            self.serials[obj.id] = serial
+        self.emit(ALLOC, serial, size)
+
+    def root_added(self, obj):
+        self.emit(ROOT_ADD, self.serials[obj.id])
+
+    def root_removed(self, obj_id, index):
+        self.emit(ROOT_REMOVE, self.serials[obj_id], index)
+
+    def ref_added(self, src, dst_id):
+        self.emit(REF_ADD, self.serials[src.id], self.serials[dst_id])
+
+    def ref_removed(self, src, dst_id):
+        self.emit(REF_REMOVE, self.serials[src.id], self.serials[dst_id])
+
+    def end_slice(self):
+        self.emit(SLICE, self.cycles)
+
+    def end_cycle(self):
+        self.cycles += 1
+        self.emit(CYCLE, self.cycles)
+
+    def flush(self):
+        if sys.byteorder == "big":
+            self.buffer.byteswap()
+        self.buffer.tofile(self.file)
+        self.buffer = array('I')
+
+    def close(self):
+        self.flush()
+        self.file.close()
+
+
+def read_events(path):
+    with open(path, 'rb') as file:
+        magic, version = HEADER.unpack(file.read(HEADER.size))
+    if magic != MAGIC or version != VERSION:
+        raise ValueError(f"{path} is not a version {VERSION} GC trace")
+    return np.memmap(path, dtype='<u4', mode='r', offset=HEADER.size).reshape(-1, 3)
+
+
+def count_cycles(path):
+    return int(np.count_nonzero(read_events(path)[:, 0] == CYCLE))
+
+
+class TraceReplayer:
+    def __init__(self, path):
+        self.events = read_events(path)
+        self.position = 0
+        self.chunk = []
+        self.chunk_index = 0
+        # serial -> id and back. Objects are looked up in the manager's table rather than held, and a
+        # serial is forgotten when its id is handed to a new object, so this stays as small as the table.
+        self.ids = {}
+        self.serials = {}
+        self.cycle_done = False
+
+    def next_event(self):
+        if self.chunk_index == len(self.chunk):
+            if self.position >= len(self.events):
+                return None
+            self.chunk = self.events[self.position:self.position + READ_CHUNK].tolist()
+            self.position += len(self.chunk)
+            self.chunk_index = 0
+        event = self.chunk[self.chunk_index]
+        self.chunk_index += 1
+        return event
+
+    def live(self, manager, serial):
+        obj_id = self.ids.get(serial)
+        if obj_id is None:
+            return None
+        obj = manager.allocated_memory[obj_id]
+        if obj is None:
+            del self.ids[serial], self.serials[obj_id]
+        return obj
+
+    def apply_slice(self, manager):
+        # Replays the events of one mutator call. A collector that mutates more often than the
+        # recorded one finds the cycle exhausted and does nothing until finish_cycle().
+        while not self.cycle_done:
+            event = self.next_event()
+            if event is None:
+                return
+            op, a, b = event
+            if op == SLICE:
+                return
+            if op == CYCLE:
+                self.cycle_done = True
+                return
+            self.apply(manager, op, a, b)
+
+    def finish_cycle(self, manager):
+        while not self.cycle_done:
+            event = self.next_event()
+            if event is None:
+                break
+            if event[0] == CYCLE:
+                break
+            if event[0] != SLICE:
+                self.apply(manager, *event)
+        self.cycle_done = False
+
+    def apply(self, manager, op, a, b):
+        if op == ALLOC:
+            obj = manager.allocate(b)
+            if obj is not None:
+                stale = self.serials.pop(obj.id, None)
+                if stale is not None:
+                    del self.ids[stale]
+                self.ids[a] = obj.id
+                self.serials[obj.id] = a
+            return
+        src = self.live(manager, a)
+        if src is None:
+            return
+        if op == ROOT_ADD:
+            manager.add_root(src)
+        elif op == ROOT_REMOVE:
+            if src.id in manager.roots:
+                manager.remove_root(manager.roots.index(src.id))
+        elif op == REF_ADD:
+            dst = self.live(manager, b)
+            if dst is not None:
+                manager.add_ref(src, dst)
+        elif op == REF_REMOVE:
+            dst = self.live(manager, b)
+            if dst is not None and dst.id in src.refs:
+                manager.remove_ref(src, src.refs.index(dst.id))
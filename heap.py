@@ -0,0 +1,308 @@
+import bisect
+import tempfile
+from array import array
+
+import numpy as np
+
+from allocators import FirstFitAllocator
+
+FIND_CHUNK = 1 << 16
+
+
+def free_runs(free_mask):
+    padded = np.zeros(len(free_mask) + 2, dtype=np.int8)
+    padded[1:-1] = free_mask
+    edges = np.flatnonzero(np.diff(padded))
+    return edges[::2], edges[1::2] - edges[::2]
+
+
+class LayoutSnapshot:
+    def __init__(self, total_memory, starts, lengths, ids):
+        self.total_memory = total_memory
+        self.starts = starts
+        self.lengths = lengths
+        self.ids = ids
+
+    def __len__(self):
+        return self.total_memory
+
+    def extents(self):
+        return zip(self.starts, self.lengths, self.ids)
+
+    def render(self):
+        cells = [-1] * self.total_memory
+        for start, length, obj_id in self.extents():
+            cells[start:start + length] = [obj_id] * length
+        return cells
+
+    def render_array(self, width=None):
+        if width is None or width >= self.total_memory:
+            cells = np.full(self.total_memory, -1, dtype=np.int32)
+            for start, length, obj_id in self.extents():
+                cells[start:start + length] = obj_id
+            return cells
+        # Each column stands for total_memory / width cells and shows an object occupying any of
+        # them, so the cost follows the extent count and the width rather than the heap size.
+        cells = np.full(width, -1, dtype=np.int32)
+        starts = np.asarray(self.starts, dtype=np.int64)
+        if not starts.size:
+            return cells
+        first = starts * width // self.total_memory
+        last = (starts + np.asarray(self.lengths, dtype=np.int64) - 1) * width // self.total_memory
+        counts = last - first + 1
+        columns = np.repeat(first - np.cumsum(counts) + counts, counts) + np.arange(int(counts.sum()))
+        cells[columns] = np.repeat(np.asarray(self.ids, dtype=np.int32), counts)
+        return cells
+
+
+class LayoutMirror:
+    # A copy of a heap's extents kept up to date from its change log, for a reader in another thread.
+    def __init__(self, total_memory):
+        self.total_memory = total_memory
+        self.extents = {}  # start -> (length, id)
+
+    def apply(self, changes):
+        extents = self.extents
+        for start, length, obj_id in changes:
+            if obj_id < 0:
+                del extents[start]
+            else:
+                extents[start] = (length, obj_id)
+
+    def snapshot(self):
+        starts = list(self.extents)
+        lengths = [length for length, _ in self.extents.values()]
+        ids = [obj_id for _, obj_id in self.extents.values()]
+        return LayoutSnapshot(self.total_memory, starts, lengths, ids)
+
+
+class ExtentHeap:
+    mapped = False  # cells live in a file rather than in process memory
+
+    def __init__(self, total_memory, allocator):
+        self.total_memory = total_memory
+        self.allocator = allocator
+        self.reserved = 0
+        self.starts = array('q')
+        self.lengths = array('q')
+        self.ids = array('q')
+        self.cells_touched = 0
+        self.changes = None
+
+    def __len__(self):
+        return len(self.starts)
+
+    def record_changes(self):
+        # From now on every extent added or removed is logged as (start, length, id), with id -1 for a
+        # removal, until drain_changes() hands the log over. It starts with the current extents.
+        self.changes = list(zip(self.starts, self.lengths, self.ids))
+
+    def drain_changes(self):
+        changes, self.changes = self.changes, []
+        return changes
+
+    def reserve_prefix(self, size):
+        self.reserved = size
+        if size:
+            self.allocator.reserve(0, size)
+
+    def track(self, obj_id, start, size):
+        self.cells_touched += size
+        if self.changes is not None:
+            self.changes.append((start, size, obj_id))
+        i = bisect.bisect_left(self.starts, start)
+        self.starts.insert(i, start)
+        self.lengths.insert(i, size)
+        self.ids.insert(i, obj_id)
+
+    def untrack(self, start):
+        i = bisect.bisect_left(self.starts, start)
+        if i == len(self.starts) or self.starts[i] != start:
+            raise ValueError(f"No extent starts at {start}")
+        size = self.lengths[i]
+        del self.starts[i], self.lengths[i], self.ids[i]
+        self.cells_touched += size
+        if self.changes is not None:
+            self.changes.append((start, size, -1))
+        return size
+
+    def find(self, size):
+        return self.allocator.find(size)
+
+    def place(self, obj_id, size):
+        start = self.allocator.allocate(size)
+        if start is not None:
+            self.track(obj_id, start, size)
+        return start
+
+    def place_at(self, obj_id, start, size):
+        self.allocator.reserve(start, size)
+        self.track(obj_id, start, size)
+
+    def free(self, start):
+        size = self.untrack(start)
+        self.allocator.release(start, size)
+        return size
+
+    def move(self, obj_id, old_start, new_start):
+        size = self.free(old_start)
+        self.place_at(obj_id, new_start, size)
+        return size
+
+    def forget_range(self, lo, hi):
+        # Drops every extent starting in [lo, hi) without touching the free index or the objects.
+        i = bisect.bisect_left(self.starts, lo)
+        j = bisect.bisect_left(self.starts, hi)
+        if self.changes is not None:
+            self.changes.extend((self.starts[k], self.lengths[k], -1) for k in range(i, j))
+        del self.starts[i:j], self.lengths[i:j], self.ids[i:j]
+
+    @property
+    def free_index(self):
+        return self.allocator.free
+
+    def lowest_fit(self, size):
+        return self.free_index.first_fit(size)
+
+    def fragmentation(self):
+        return self.free_index.external_fragmentation()
+
+    def fragmentation_metrics(self):
+        free = self.free_index
+        return {
+            "largest_free": free.largest(),
+            "free_extents": free.extent_count(),
+            "free_cells": free.total_free(),
+            "external_fragmentation": free.external_fragmentation(),
+            "free_histogram": free.histogram(),
+        }
+
+    def log_clear(self):
+        if self.changes is not None:
+            self.changes.extend((start, length, -1) for start, length in zip(self.starts, self.lengths))
+
+    def clear(self):
+        self.log_clear()
+        self.starts = array('q')
+        self.lengths = array('q')
+        self.ids = array('q')
+        self.allocator.reset()
+        self.reserve_prefix(self.reserved)
+
+    def snapshot(self):
+        return LayoutSnapshot(self.total_memory, array('q', self.starts), array('q', self.lengths), array('q', self.ids))
+
+    def render(self):
+        return LayoutSnapshot(self.total_memory, self.starts, self.lengths, self.ids).render()
+
+    def render_array(self):
+        return LayoutSnapshot(self.total_memory, self.starts, self.lengths, self.ids).render_array()
+
+
+class DenseHeap(ExtentHeap):
+    # Free space is found by scanning cells; the allocator's free extent index is kept alongside for
+    # metrics and for the collectors that take ranges out of it.
+    base = 0  # a cell holds its object's id + base, a free cell base - 1
+
+    def __init__(self, total_memory, allocator):
+        super().__init__(total_memory, allocator)
+        self.cells = self.make_cells(total_memory)
+
+    def make_cells(self, total_memory):
+        return np.full(total_memory, -1, dtype=np.int32)
+
+    def find(self, size):
+        carry_start, carry = 0, 0
+        for lo in range(self.reserved, self.total_memory, FIND_CHUNK):
+            chunk = self.cells[lo:lo + FIND_CHUNK]
+            starts, lengths = free_runs(chunk == self.base - 1)
+            starts += lo
+            if carry and starts.size and starts[0] == lo:
+                starts[0] = carry_start
+                lengths[0] += carry
+            fits = np.flatnonzero(lengths >= size)
+            if fits.size:
+                return int(starts[fits[0]])
+            if starts.size and starts[-1] + lengths[-1] == lo + len(chunk):
+                carry_start, carry = int(starts[-1]), int(lengths[-1])
+            else:
+                carry = 0
+        return None
+
+    def track(self, obj_id, start, size):
+        if (self.cells[start:start + size] != self.base - 1).any():
+            raise ValueError(f"Range {start}:{start + size} is not free")
+        self.cells[start:start + size] = obj_id + self.base
+        super().track(obj_id, start, size)
+
+    def untrack(self, start):
+        size = super().untrack(start)
+        self.cells[start:start + size] = self.base - 1
+        return size
+
+    def place(self, obj_id, size):
+        start = self.find(size)
+        if start is not None:
+            self.place_at(obj_id, start, size)
+        return start
+
+    def lowest_fit(self, size):
+        return self.find(size)
+
+    def forget_range(self, lo, hi):
+        super().forget_range(lo, hi)
+        self.cells[lo:hi] = self.base - 1
+
+    def clear(self):
+        self.cells = self.make_cells(self.total_memory)
+        self.cells_touched += self.total_memory
+        super().clear()
+
+    def render(self):
+        return self.render_array().tolist()
+
+    def render_array(self):
+        return np.asarray(self.cells) - self.base
+
+
+class MappedHeap(DenseHeap):
+    # A dense heap whose cells are an np.memmap over an unlinked temporary file, so heaps larger than
+    # RAM are paged in and out by the OS. Cells hold id + 1 and 0 when free, so the file starts out
+    # sparse and a page is only materialized once an object is placed on it. Placement goes through
+    # the allocator, whose free extent index mirrors the cells exactly, so allocating never reads the
+    # file; sweeps and compaction visit objects in address order, so their writes to it are sequential.
+    mapped = True
+    base = 1
+
+    def __init__(self, total_memory, allocator, directory=None):
+        self.directory = directory
+        super().__init__(total_memory, allocator)
+
+    def make_cells(self, total_memory):
+        self.file = tempfile.TemporaryFile(prefix="gc_heap_", dir=self.directory)
+        return np.memmap(self.file, dtype=np.int32, mode='w+', shape=(total_memory,))
+
+    def find(self, size):
+        return self.allocator.find(size)
+
+    def lowest_fit(self, size):
+        return ExtentHeap.lowest_fit(self, size)
+
+
+LAYOUT_MODES = {"extents": ExtentHeap, "dense": DenseHeap, "mapped": MappedHeap}
+
+
+def check_layout(mode, allocator):
+    # allocator is a policy name. The dense layout finds space by scanning its cells, which is first-fit.
+    if mode not in LAYOUT_MODES:
+        raise ValueError(f"Unknown layout mode '{mode}', choose from {', '.join(LAYOUT_MODES)}")
+    if LAYOUT_MODES[mode] is DenseHeap and allocator != FirstFitAllocator.name:
+        raise ValueError(f"The dense layout always places first-fit; use the extents or mapped layout for {allocator}")
+
+
+def make_heap(mode, total_memory, allocator, directory=None):
+    # directory is where a mapped heap keeps its cell file; None uses the system temporary directory.
+    check_layout(mode, allocator.name)
+    if LAYOUT_MODES[mode].mapped:
+        return LAYOUT_MODES[mode](total_memory, allocator, directory)
+    return LAYOUT_MODES[mode](total_memory, allocator)
@@ -0,0 +1,69 @@
+from time import perf_counter_ns
+
+IDLE, MARK, SWEEP, COMPACT = "idle", "mark", "sweep", "compact"
+CLOCK_CHECK_INTERVAL = 16
+
+
+class Budget:
+    def __init__(self, objects=None, microseconds=None):
+        self.objects = objects
+        self.microseconds = microseconds
+        self.deadline = None
+        self.used = 0
+
+    def start(self):
+        self.used = 0
+        if self.microseconds is not None:
+            self.deadline = perf_counter_ns() + int(self.microseconds * 1000)
+
+    def spend(self):
+        self.used += 1
+        if self.objects is not None and self.used >= self.objects:
+            return False
+        if self.deadline is not None and self.used % CLOCK_CHECK_INTERVAL == 0:
+            return perf_counter_ns() < self.deadline
+        return True
+
+
+class TriColorMarker:
+    # White: mark != parity. Grey: mark == parity and on the grey stack. Black: mark == parity and scanned.
+    # Marks are the object table's byte-per-id map, and flipping the parity whitens every object at once.
+    def __init__(self, objects):
+        self.objects = objects
+        self.parity = 1
+        self.grey = []
+        self.visited = 0
+
+    def start(self, roots):
+        self.parity ^= 1
+        self.grey = []
+        self.visited = 0
+        for root in roots:
+            self.shade(self.objects[root])
+
+    def is_black_or_grey(self, obj):
+        return self.objects.marks[obj.id] == self.parity
+
+    def allocate_black(self, obj):
+        self.objects.marks[obj.id] = self.parity
+
+    def shade(self, obj):
+        marks = self.objects.marks
+        if marks[obj.id] != self.parity:
+            marks[obj.id] = self.parity
+            self.grey.append(obj)
+
+    def write_barrier(self, dst):
+        self.shade(dst)
+
+    def step(self, budget):
+        objects = self.objects
+        grey = self.grey
+        while grey:
+            obj = grey.pop()
+            self.visited += 1
+            for ref in obj.refs:
+                self.shade(objects[ref])
+            if not budget.spend():
+                break
+        return not grey
@@ -0,0 +1,203 @@
+import csv
+import sys
+import tracemalloc
+from time import perf_counter_ns
+
+PHASES = ("mutator", "mark", "sweep", "compact", "copy", "refcount", "cycle_collect")
+COUNTERS = ("objects_visited", "cells_touched", "cells_moved")
+
+
+class CycleStats:
+    def __init__(self, cycle, phases, counters, memory=None, fragmentation=None):
+        self.cycle = cycle
+        self.phases = phases  # phase name -> nanoseconds, exclusive of nested phases
+        self.counters = counters
+        self.memory = memory  # tracemalloc (current, peak) bytes, when tracing
+        self.fragmentation = fragmentation  # heap free-space metrics at the end of the cycle
+
+    @property
+    def total_ns(self):
+        return sum(self.phases.values())
+
+    def row(self):
+        row = {"cycle": self.cycle}
+        row.update((f"{name}_ns", ns) for name, ns in self.phases.items())
+        row.update(self.counters)
+        if self.fragmentation is not None:
+            row.update(self.fragmentation)
+            row["free_histogram"] = " ".join(map(str, self.fragmentation["free_histogram"]))
+        if self.memory is not None:
+            row["traced_bytes"], row["traced_peak_bytes"] = self.memory
+        return row
+
+
+class Phase:
+    def __init__(self, instruments, name):
+        self.instruments = instruments
+        self.name = name
+
+    def __enter__(self):
+        self.instruments.enter(self.name)
+
+    def __exit__(self, *exc):
+        self.instruments.exit()
+
+
+class Instrumentation:
+    # Nested phases pause the enclosing one, so a collection triggered from inside allocate()
+    # is charged to its own phases rather than to the mutator.
+    def __init__(self, count_allocations=False, trace_memory=False):
+        self.count_allocations = count_allocations
+        self.trace_memory = trace_memory
+        self.subscribers = []
+        self.phases = {}
+        self.cache = {}
+        self.counters = dict.fromkeys(COUNTERS, 0)
+        self.stack = []
+        self.mark = 0
+        self.cycle = 0
+        self.heap = None
+        self.cells_mark = 0
+        self.blocks_mark = sys.getallocatedblocks()
+        if trace_memory and not tracemalloc.is_tracing():
+            tracemalloc.start()
+
+    def attach(self, heap):
+        self.heap = heap
+        self.cells_mark = heap.cells_touched
+
+    def subscribe(self, callback):
+        self.subscribers.append(callback)
+        return callback
+
+    def unsubscribe(self, callback):
+        self.subscribers.remove(callback)
+
+    def phase(self, name):
+        phase = self.cache.get(name)
+        if phase is None:
+            phase = self.cache[name] = Phase(self, name)
+        return phase
+
+    def enter(self, name):
+        now = perf_counter_ns()
+        if self.stack:
+            top = self.stack[-1]
+            self.phases[top] = self.phases.get(top, 0) + now - self.mark
+        self.stack.append(name)
+        self.mark = now
+
+    def exit(self):
+        now = perf_counter_ns()
+        name = self.stack.pop()
+        self.phases[name] = self.phases.get(name, 0) + now - self.mark
+        self.mark = now
+
+    def count(self, name, amount=1):
+        self.counters[name] = self.counters.get(name, 0) + amount
+
+    def end_cycle(self):
+        self.cycle += 1
+        if self.heap is not None:
+            self.counters["cells_touched"] = self.heap.cells_touched - self.cells_mark
+            self.cells_mark = self.heap.cells_touched
+        if self.count_allocations:
+            blocks = sys.getallocatedblocks()
+            self.counters["allocated_blocks"] = blocks - self.blocks_mark
+            self.blocks_mark = blocks
+        memory = None
+        if self.trace_memory:
+            memory = tracemalloc.get_traced_memory()
+            tracemalloc.reset_peak()
+        fragmentation = self.heap.fragmentation_metrics() if self.heap is not None else None
+        stats = CycleStats(self.cycle, {name: self.phases.get(name, 0) for name in self.phase_names()}, self.counters, memory, fragmentation)
+        self.phases = {}
+        self.counters = dict.fromkeys(COUNTERS, 0)
+        for callback in self.subscribers:
+            callback(stats)
+        return stats
+
+    def phase_names(self):
+        return list(PHASES) + sorted(name for name in self.phases if name not in PHASES)
+
+
+class CsvSubscriber:
+    def __init__(self, path):
+        self.file = open(path, mode='w', newline='')
+        self.writer = None
+
+    def __call__(self, stats):
+        row = stats.row()
+        if self.writer is None:
+            self.writer = csv.DictWriter(self.file, fieldnames=list(row), extrasaction='ignore', restval=0)
+            self.writer.writeheader()
+        self.writer.writerow(row)
+
+    def close(self):
+        self.file.close()
+
+
+class PrometheusSubscriber:
+    # Accumulates cycle stats into counters rendered in the Prometheus text exposition format.
+    def __init__(self, prefix="gc_sim", labels=None):
+        self.prefix = prefix
+        self.labels = labels or {}
+        self.cycles = 0
+        self.phase_ns = {}
+        self.counters = {}
+        self.max_cycle_ns = 0
+        self.memory = None
+        self.fragmentation = None
+
+    def __call__(self, stats):
+        self.cycles += 1
+        for name, ns in stats.phases.items():
+            self.phase_ns[name] = self.phase_ns.get(name, 0) + ns
+        for name, value in stats.counters.items():
+            self.counters[name] = self.counters.get(name, 0) + value
+        self.max_cycle_ns = max(self.max_cycle_ns, stats.total_ns)
+        if stats.memory is not None:
+            self.memory = stats.memory
+        if stats.fragmentation is not None:
+            self.fragmentation = stats.fragmentation
+
+    def label_text(self, **extra):
+        labels = {**self.labels, **extra}
+        if not labels:
+            return ""
+        return "{" + ",".join(f'{key}="{value}"' for key, value in sorted(labels.items())) + "}"
+
+    def render(self):
+        p = self.prefix
+        lines = [
+            f"# HELP {p}_cycles_total Simulated collection cycles.",
+            f"# TYPE {p}_cycles_total counter",
+            f"{p}_cycles_total{self.label_text()} {self.cycles}",
+            f"# HELP {p}_phase_seconds_total Time spent per phase.",
+            f"# TYPE {p}_phase_seconds_total counter",
+        ]
+        for name, ns in self.phase_ns.items():
+            lines.append(f"{p}_phase_seconds_total{self.label_text(phase=name)} {ns / 1e9:.9f}")
+        lines += [
+            f"# HELP {p}_max_cycle_seconds Longest cycle so far.",
+            f"# TYPE {p}_max_cycle_seconds gauge",
+            f"{p}_max_cycle_seconds{self.label_text()} {self.max_cycle_ns / 1e9:.9f}",
+        ]
+        for name, value in self.counters.items():
+            lines += [f"# TYPE {p}_{name}_total counter", f"{p}_{name}_total{self.label_text()} {value}"]
+        if self.fragmentation is not None:
+            for name in ("largest_free", "free_extents", "free_cells", "external_fragmentation"):
+                lines += [f"# TYPE {p}_heap_{name} gauge", f"{p}_heap_{name}{self.label_text()} {self.fragmentation[name]}"]
+            lines.append(f"# TYPE {p}_heap_free_extents_by_class gauge")
+            for size_class, count in enumerate(self.fragmentation["free_histogram"]):
+                lines.append(f"{p}_heap_free_extents_by_class{self.label_text(min_size=2 ** size_class)} {count}")
+        if self.memory is not None:
+            lines += [
+                f"# TYPE {p}_traced_peak_bytes gauge",
+                f"{p}_traced_peak_bytes{self.label_text()} {self.memory[1]}",
+            ]
+        return "\n".join(lines) + "\n"
+
+    def write(self, path):
+        with open(path, mode='w') as file:
+            file.write(self.render())
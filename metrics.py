@@ -0,0 +1,202 @@
+import bisect
+import math
+
+import numpy as np
+
+CAPACITY = 1024  # samples kept per resolution
+FACTORS = (1, 16, 256)  # samples averaged into one point at each resolution
+QUANTILES = (0.5, 0.9, 0.99)
+
+
+class RingBuffer:
+    def __init__(self, capacity):
+        self.data = np.zeros(capacity, dtype=np.float64)
+        self.head = 0
+        self.size = 0
+
+    def __len__(self):
+        return self.size
+
+    def append(self, value):
+        capacity = len(self.data)
+        self.data[(self.head + self.size) % capacity] = value
+        if self.size < capacity:
+            self.size += 1
+        else:
+            self.head = (self.head + 1) % capacity
+
+    def values(self):
+        end = self.head + self.size
+        if end <= len(self.data):
+            return self.data[self.head:end].copy()
+        return np.concatenate((self.data[self.head:], self.data[:end - len(self.data)]))
+
+
+class P2Quantile:
+    # Jain and Chlamtac's P-square estimator: five markers whose heights track the minimum, the
+    # quantile, the maximum and the points halfway between, adjusted by a parabolic fit per sample.
+    def __init__(self, p):
+        self.p = p
+        self.heights = []
+        self.positions = [1, 2, 3, 4, 5]
+        self.desired = [1, 1 + 2 * p, 1 + 4 * p, 3 + 2 * p, 5]
+        self.increments = [0, p / 2, p, (1 + p) / 2, 1]
+
+    def add(self, x):
+        q = self.heights
+        if len(q) < 5:
+            bisect.insort(q, x)
+            return
+        if x < q[0]:
+            q[0] = x
+            k = 0
+        elif x >= q[4]:
+            q[4] = x
+            k = 3
+        else:
+            k = bisect.bisect_right(q, x) - 1
+        n = self.positions
+        for i in range(k + 1, 5):
+            n[i] += 1
+        for i in range(5):
+            self.desired[i] += self.increments[i]
+        for i in (1, 2, 3):
+            d = self.desired[i] - n[i]
+            if (d >= 1 and n[i + 1] - n[i] > 1) or (d <= -1 and n[i - 1] - n[i] < -1):
+                d = 1 if d > 0 else -1
+                height = q[i] + d / (n[i + 1] - n[i - 1]) * ((n[i] - n[i - 1] + d) * (q[i + 1] - q[i]) / (n[i + 1] - n[i])
+                                                             + (n[i + 1] - n[i] - d) * (q[i] - q[i - 1]) / (n[i] - n[i - 1]))
+                if not q[i - 1] < height < q[i + 1]:
+                    height = q[i] + d * (q[i + d] - q[i]) / (n[i + d] - n[i])
+                q[i] = height
+                n[i] += d
+
+    def value(self):
+        q = self.heights
+        if not q:
+            return 0.0
+        if len(q) < 5:
+            return float(np.percentile(q, self.p * 100))
+        return q[2]
+
+
+class Level:
+    # One resolution: each point is the mean and the maximum of `factor` consecutive samples.
+    def __init__(self, factor, capacity):
+        self.factor = factor
+        self.means = RingBuffer(capacity)
+        self.maxima = RingBuffer(capacity)
+        self.points = 0
+        self.total = 0.0
+        self.peak = -math.inf
+        self.pending = 0
+
+    def add(self, value):
+        self.total += value
+        self.peak = max(self.peak, value)
+        self.pending += 1
+        if self.pending == self.factor:
+            self.means.append(self.total / self.factor)
+            self.maxima.append(self.peak)
+            self.points += 1
+            self.total = 0.0
+            self.peak = -math.inf
+            self.pending = 0
+
+    def first_sample(self):
+        return (self.points - len(self.means)) * self.factor
+
+    def complete(self):
+        return self.points <= len(self.means)
+
+    def values(self, peak=False):
+        # Retained points, followed by a partly filled one.
+        values = (self.maxima if peak else self.means).values()
+        x = self.first_sample() + self.factor * np.arange(len(values) + bool(self.pending))
+        if self.pending:
+            values = np.append(values, self.peak if peak else self.total / self.pending)
+        return x, values
+
+
+class Series:
+    # A metric's full history in constant memory: running count, mean, min, max and streaming
+    # quantiles over every sample, plus the most recent samples at several resolutions. Appends cost
+    # the same however long the run has been going.
+    def __init__(self, capacity=CAPACITY, factors=FACTORS, quantiles=QUANTILES):
+        self.count = 0
+        self.total = 0.0
+        self.min = math.inf
+        self.max = -math.inf
+        self.last = None
+        self.estimators = {q: P2Quantile(q) for q in quantiles}
+        self.levels = [Level(factor, capacity) for factor in factors]
+
+    def __len__(self):
+        return self.count
+
+    def append(self, value):
+        self.count += 1
+        self.total += value
+        self.min = min(self.min, value)
+        self.max = max(self.max, value)
+        self.last = value
+        for estimator in self.estimators.values():
+            estimator.add(value)
+        for level in self.levels:
+            level.add(value)
+
+    @property
+    def mean(self):
+        return self.total / self.count if self.count else 0.0
+
+    def quantile(self, q):
+        if q not in self.estimators:
+            raise KeyError(f"Quantile {q} is not tracked, choose from {', '.join(map(str, self.estimators))}")
+        return self.estimators[q].value()
+
+    def recent(self, n=None):
+        # The last n samples at full resolution (all retained ones if n is None).
+        values = self.levels[0].means.values()
+        return values if n is None else values[len(values) - min(n, len(values)):]
+
+    def history(self, max_points=None, peak=False):
+        # (sample index, mean or maximum) at the finest resolution that still reaches back to the first
+        # sample, or the coarsest one once the run has outgrown them all; at most max_points points.
+        level = next((level for level in self.levels if level.complete()), self.levels[-1])
+        x, values = level.values(peak)
+        if max_points is not None and len(values) > max_points:
+            step = -(-len(values) // max_points)
+            x, values = x[::step], values[::step]
+        return x, values
+
+    def summary(self):
+        stats = {"count": self.count, "mean": self.mean, "min": self.min if self.count else 0.0, "max": self.max if self.count else 0.0}
+        stats.update((f"p{round(q * 100):g}", self.quantile(q)) for q in self.estimators)
+        return stats
+
+
+class MetricsStore:
+    def __init__(self, capacity=CAPACITY, factors=FACTORS, quantiles=QUANTILES):
+        self.capacity = capacity
+        self.factors = factors
+        self.quantiles = quantiles
+        self.series_by_name = {}
+
+    def __contains__(self, name):
+        return name in self.series_by_name
+
+    def __getitem__(self, name):
+        return self.series_by_name[name]
+
+    def series(self, name):
+        series = self.series_by_name.get(name)
+        if series is None:
+            series = self.series_by_name[name] = Series(self.capacity, self.factors, self.quantiles)
+        return series
+
+    def record(self, values):
+        for name, value in values.items():
+            self.series(name).append(value)
+
+    def summary(self):
+        return {name: series.summary() for name, series in self.series_by_name.items()}
@@ -0,0 +1,54 @@
+from array import array
+
+import numpy as np
+
+
+def new_refs():
+    return array('q')
+
+
+def mark_from_roots(roots, objects, marks):
+    # marks is a byte per object id; the stack holds ids so unmarked children are never fetched.
+    stack = list(roots)
+    visited = 0
+    while stack:
+        obj_id = stack.pop()
+        if marks[obj_id]:
+            continue
+        marks[obj_id] = 1
+        visited += 1
+        for ref in objects[obj_id].refs:
+            if not marks[ref]:
+                stack.append(ref)
+    return visited
+
+
+def to_csr(objects, num_nodes):
+    degree = np.zeros(num_nodes, dtype=np.int64)
+    chunks = []
+    # Ids not in use keep a degree of zero.
+    for obj in objects:
+        degree[obj.id] = len(obj.refs)
+        if obj.refs:
+            chunks.append(np.frombuffer(obj.refs, dtype=np.int64))
+    indptr = np.zeros(num_nodes + 1, dtype=np.int64)
+    np.cumsum(degree, out=indptr[1:])
+    indices = np.concatenate(chunks) if chunks else np.zeros(0, dtype=np.int64)
+    return indptr, indices
+
+
+def mark_csr(indptr, indices, roots, num_nodes):
+    marked = np.zeros(num_nodes, dtype=bool)
+    frontier = np.unique(np.asarray(roots, dtype=np.int64))
+    marked[frontier] = True
+    while frontier.size:
+        starts = indptr[frontier]
+        counts = indptr[frontier + 1] - starts
+        total = int(counts.sum())
+        if not total:
+            break
+        offsets = np.repeat(starts - np.cumsum(counts) + counts, counts) + np.arange(total)
+        children = np.unique(indices[offsets])
+        frontier = children[~marked[children]]
+        marked[frontier] = True
+    return marked
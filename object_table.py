@@ -0,0 +1,89 @@
+import mmap
+import tempfile
+
+import numpy as np
+
+MAP_CAPACITY = 1 << 16  # ids a mapped table has room for before its mark file grows
+
+
+class ObjectTable:
+    # Objects indexed by id. Freed ids are recycled, so the table grows with the peak number of live
+    # objects rather than with every allocation, and dead objects are not kept alive by the table.
+    # Mark bits live in a separate byte-per-id map, so resetting them is one allocation instead of a
+    # pass over the objects.
+    def __init__(self):
+        self.objects = []
+        self.marks = bytearray()
+        self.free_ids = []
+
+    def __len__(self):
+        return len(self.objects)
+
+    def __getitem__(self, obj_id):
+        return self.objects[obj_id]
+
+    def __iter__(self):
+        return (obj for obj in self.objects if obj is not None)
+
+    def next_id(self):
+        return self.free_ids[-1] if self.free_ids else len(self.objects)
+
+    def add(self, obj):
+        if obj.id == len(self.objects):
+            self.objects.append(obj)
+            self.marks.append(0)
+            return
+        if not self.free_ids or self.free_ids[-1] != obj.id:
+            raise ValueError(f"Object id {obj.id} is not the next free id")
+        self.free_ids.pop()
+        self.objects[obj.id] = obj
+
+    def release(self, obj_id):
+        self.objects[obj_id] = None
+        self.free_ids.append(obj_id)
+
+    def clear_marks(self):
+        self.marks = bytearray(len(self.objects))
+        return self.marks
+
+    def set_marks(self, marked):
+        self.marks = bytearray(np.asarray(marked, dtype=np.uint8).tobytes())
+        return self.marks
+
+
+class MappedObjectTable(ObjectTable):
+    # Keeps the mark map in an unlinked temporary file mapped with mmap, which indexes like the
+    # bytearray, so a table of many millions of ids does not hold its marks in process memory. The
+    # file doubles when the ids outgrow it; marks are cleared and set in place.
+    def __init__(self, directory=None):
+        super().__init__()
+        self.file = tempfile.TemporaryFile(prefix="gc_marks_", dir=directory)
+        self.capacity = 0
+        self.grow(MAP_CAPACITY)
+
+    def grow(self, capacity):
+        # Readers fetch objects.marks afresh, so the old map is left for them to drop.
+        self.file.truncate(capacity)
+        self.marks = mmap.mmap(self.file.fileno(), capacity)
+        self.capacity = capacity
+
+    def add(self, obj):
+        if obj.id == len(self.objects):
+            if obj.id == self.capacity:
+                self.grow(self.capacity * 2)
+            self.objects.append(obj)
+            self.marks[obj.id] = 0
+            return
+        super().add(obj)
+
+    def clear_marks(self):
+        view = np.frombuffer(self.marks, dtype=np.uint8)
+        view[:len(self.objects)] = 0
+        del view
+        return self.marks
+
+    def set_marks(self, marked):
+        view = np.frombuffer(self.marks, dtype=np.uint8)
+        view[:len(self.objects)] = np.asarray(marked, dtype=np.uint8)
+        del view
+        return self.marks
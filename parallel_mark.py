@@ -0,0 +1,194 @@
+import multiprocessing as mp
+import random
+import threading
+import time
+from multiprocessing import shared_memory
+
+import numpy as np
+
+BATCH = 256  # nodes taken from a deque per pop
+MARK_MODES = ("threads", "processes")
+
+
+def expand(indptr, indices, nodes):
+    starts = indptr[nodes]
+    counts = indptr[nodes + 1] - starts
+    total = int(counts.sum())
+    if not total:
+        return indices[:0]
+    offsets = np.repeat(starts - np.cumsum(counts) + counts, counts) + np.arange(total)
+    return np.unique(indices[offsets])
+
+
+class MarkState:
+    # Everything the workers share: the CSR graph, a mark byte per node, one ring-buffer deque per
+    # worker and an idle counter. Under the processes mode the arrays live in shared memory and are
+    # re-attached by name when the state is pickled for a spawned worker.
+    def __init__(self, indptr, indices, num_nodes, workers, locks, idle_lock, shared=False):
+        self.workers = workers
+        self.num_nodes = num_nodes
+        self.locks = locks
+        self.idle_lock = idle_lock
+        self.segments = {}
+        self.specs = {
+            "indptr": (indptr.shape, indptr.dtype),
+            "indices": (indices.shape, indices.dtype),
+            "marked": ((num_nodes,), np.uint8),
+            "buffers": ((workers, max(1, num_nodes)), np.int64),
+            "control": ((workers + 1, 2), np.int64),  # head and tail per deque; last row holds the idle count
+        }
+        for name, (shape, dtype) in self.specs.items():
+            if shared:
+                segment = shared_memory.SharedMemory(create=True, size=max(1, int(np.prod(shape)) * np.dtype(dtype).itemsize))
+                self.segments[name] = segment
+                array = np.ndarray(shape, dtype=dtype, buffer=segment.buf)
+            else:
+                array = np.empty(shape, dtype=dtype)
+            setattr(self, name, array)
+        self.indptr[:] = indptr
+        self.indices[:] = indices
+        self.marked[:] = 0
+        self.control[:] = 0
+
+    def __getstate__(self):
+        state = {key: value for key, value in self.__dict__.items() if key not in self.specs and key != "segments"}
+        state["names"] = {name: segment.name for name, segment in self.segments.items()}
+        return state
+
+    def __setstate__(self, state):
+        names = state.pop("names")
+        self.__dict__.update(state)
+        self.segments = {}
+        for name, (shape, dtype) in self.specs.items():
+            segment = shared_memory.SharedMemory(name=names[name])
+            self.segments[name] = segment
+            setattr(self, name, np.ndarray(shape, dtype=dtype, buffer=segment.buf))
+
+    def release(self, unlink=True):
+        for name in self.specs:
+            setattr(self, name, None)
+        for segment in self.segments.values():
+            segment.close()
+            if unlink:
+                segment.unlink()
+        self.segments = {}
+
+    # Each worker pushes and pops at the tail of its own deque and thieves take the older half from
+    # the head, as in a Chase-Lev deque, but every operation holds the deque's lock. A worker pushes
+    # a node only after marking it, so no deque ever holds more than num_nodes entries.
+    def push(self, rank, nodes):
+        if not nodes.size:
+            return
+        capacity = self.buffers.shape[1]
+        with self.locks[rank]:
+            tail = int(self.control[rank, 1])
+            first = tail % capacity
+            split = min(nodes.size, capacity - first)
+            self.buffers[rank, first:first + split] = nodes[:split]
+            self.buffers[rank, :nodes.size - split] = nodes[split:]
+            self.control[rank, 1] = tail + nodes.size
+
+    def take(self, rank, count, from_head):
+        capacity = self.buffers.shape[1]
+        head, tail = (int(value) for value in self.control[rank])
+        count = min(count, tail - head)
+        if count <= 0:
+            return None
+        if from_head:
+            begin = head
+            self.control[rank, 0] = head + count
+        else:
+            begin = tail - count
+            self.control[rank, 1] = begin
+        positions = np.arange(begin, begin + count) % capacity
+        return self.buffers[rank, positions]
+
+    def pop(self, rank, batch):
+        with self.locks[rank]:
+            return self.take(rank, batch, from_head=False)
+
+    def steal(self, victim):
+        with self.locks[victim]:
+            head, tail = self.control[victim]
+            return self.take(victim, int(tail - head + 1) // 2, from_head=True)
+
+    def change_idle(self, delta):
+        with self.idle_lock:
+            self.control[self.workers, 0] += delta
+
+    def all_idle(self):
+        return self.control[self.workers, 0] == self.workers
+
+
+def mark_worker(state, rank, batch=BATCH):
+    # An idle worker may leave while a thief still holds stolen nodes; the thief then finishes them on
+    # its own, so early exits cost parallelism but never lose work.
+    rng = random.Random(rank)
+    victims = [other for other in range(state.workers) if other != rank]
+    idle = False
+    while True:
+        nodes = state.pop(rank, batch)
+        if nodes is None:
+            rng.shuffle(victims)
+            for victim in victims:
+                nodes = state.steal(victim)
+                if nodes is not None:
+                    break
+        if nodes is None:
+            if not idle:
+                state.change_idle(1)
+                idle = True
+            if state.all_idle():
+                return
+            time.sleep(0)
+            continue
+        if idle:
+            state.change_idle(-1)
+            idle = False
+        children = expand(state.indptr, state.indices, nodes)
+        # Two workers can both see a child unmarked and both push it; it is then scanned twice,
+        # which wastes a little work but cannot change the result.
+        children = children[state.marked[children] == 0]
+        state.marked[children] = 1
+        state.push(rank, children)
+
+
+def process_worker(state, rank, batch):
+    try:
+        mark_worker(state, rank, batch)
+    finally:
+        state.release(unlink=False)
+
+
+def parallel_mark(indptr, indices, roots, num_nodes, workers, mode="threads", batch=BATCH):
+    if mode not in MARK_MODES:
+        raise ValueError(f"Unknown mark mode '{mode}', choose from {', '.join(MARK_MODES)}")
+    roots = np.unique(np.asarray(roots, dtype=np.int64))
+    if not roots.size or not num_nodes:
+        return np.zeros(num_nodes, dtype=bool)
+    workers = max(1, workers)
+    if mode == "threads":
+        locks = [threading.Lock() for _ in range(workers)]
+        state = MarkState(indptr, indices, num_nodes, workers, locks, threading.Lock())
+    else:
+        context = mp.get_context()
+        locks = [context.Lock() for _ in range(workers)]
+        state = MarkState(indptr, indices, num_nodes, workers, locks, context.Lock(), shared=True)
+    try:
+        state.marked[roots] = 1
+        for rank, chunk in enumerate(np.array_split(roots, workers)):
+            state.push(rank, chunk)
+        if mode == "threads":
+            runners = [threading.Thread(target=mark_worker, args=(state, rank, batch)) for rank in range(workers)]
+        else:
+            runners = [context.Process(target=process_worker, args=(state, rank, batch)) for rank in range(workers)]
+        for runner in runners:
+            runner.start()
+        for runner in runners:
+            runner.join()
+        if mode == "processes" and any(runner.exitcode for runner in runners):
+            raise RuntimeError("A marking process failed")
+        return state.marked.astype(bool)
+    finally:
+        if mode == "processes":
+            state.release()
@@ -0,0 +1,80 @@
+import threading
+from time import perf_counter
+
+try:
+    import psutil
+except ImportError:
+    psutil = None
+
+from metrics import RingBuffer
+
+SAMPLE_INTERVAL = 0.1  # seconds between samples
+SAMPLE_CAPACITY = 4096  # samples kept
+FIELDS = ("rss", "vms", "available")
+
+
+class ProcessMemorySampler(threading.Thread):
+    # Samples the simulator process's resident and virtual size and the system's available memory on
+    # its own thread, into ring buffers. One sample is two psutil calls, tens of microseconds, so
+    # the simulation does not notice it at any sensible rate. Each sample is stamped with clock(),
+    # which defaults to seconds since start; the GUI passes the runner's cycle count instead, to
+    # plot samples against the cycle axis.
+    def __init__(self, interval=SAMPLE_INTERVAL, capacity=SAMPLE_CAPACITY, clock=None, pid=None):
+        if psutil is None:
+            raise RuntimeError("Process memory sampling needs psutil; install it with pip install psutil")
+        super().__init__(daemon=True)
+        self.interval = interval
+        self.process = psutil.Process(pid)
+        started = perf_counter()
+        self.clock = clock if clock is not None else lambda: perf_counter() - started
+        self.times = RingBuffer(capacity)
+        self.buffers = {field: RingBuffer(capacity) for field in FIELDS}
+        self.peaks = dict.fromkeys(FIELDS, 0)
+        self.lowest_available = None
+        self.last = None
+        self.count = 0
+        self.lock = threading.Lock()
+        self.stopped = threading.Event()
+
+    def sample(self):
+        info = self.process.memory_info()
+        values = {"rss": info.rss, "vms": info.vms, "available": psutil.virtual_memory().available}
+        with self.lock:
+            self.times.append(self.clock())
+            for field, value in values.items():
+                self.buffers[field].append(value)
+                self.peaks[field] = max(self.peaks[field], value)
+            available = values["available"]
+            self.lowest_available = available if self.lowest_available is None else min(self.lowest_available, available)
+            self.count += 1
+            self.last = values
+        return values
+
+    def run(self):
+        self.sample()
+        while not self.stopped.wait(self.interval):
+            self.sample()
+
+    def stop(self):
+        self.stopped.set()
+
+    def __len__(self):
+        return len(self.times)
+
+    def values(self, field):
+        # (stamps, values) of the retained samples, oldest first.
+        with self.lock:
+            return self.times.values(), self.buffers[field].values()
+
+    def summary(self):
+        with self.lock:
+            return {"samples": self.count, "peak_rss_bytes": self.peaks["rss"], "peak_vms_bytes": self.peaks["vms"],
+                    "min_available_bytes": self.lowest_available or 0}
+
+
+def format_bytes(count):
+    for unit in ("B", "KB", "MB"):
+        if count < 1024:
+            return f"{count:.1f} {unit}"
+        count /= 1024
+    return f"{count:.1f} GB"
@@ -0,0 +1,212 @@
+from array import array
+from collections import Counter
+
+BLACK, GRAY, WHITE, PURPLE = "black", "gray", "white", "purple"
+
+
+class RefCountEngine:
+    # Deferred: root references are not counted, zero-count objects wait in a zero count table (ZCT)
+    # until collect() checks the roots. Coalesced: a mutated object's old fields are logged once per
+    # epoch and only the net difference is applied at collect() (Levanoni-Petrank); while the log is
+    # non-empty counts may be stale, so objects reaching zero also wait in the ZCT.
+    def __init__(self, objects, free_object, is_rooted, deferred=True, coalesced=True):
+        self.objects = objects
+        self.free_object = free_object
+        self.is_rooted = is_rooted
+        self.deferred = deferred
+        self.coalesced = coalesced
+        self.zct = {}
+        self.log = {}
+        self.free_queue = []
+        self.candidates = {}
+        self.freed = 0
+        self.writes = 0
+        self.updates = 0
+
+    def on_new(self, obj):
+        obj.ref_count = 0
+        obj.color = BLACK
+        obj.buffered = False
+        self.zct[obj.id] = obj
+
+    def before_write(self, src):
+        self.writes += 1
+        if self.coalesced and src.id not in self.log:
+            self.log[src.id] = array('q', src.refs)
+
+    def after_write(self, old, new):
+        if self.coalesced:
+            return
+        if new is not None:
+            self.increment(new)
+        if old is not None:
+            self.decrement(old)
+            self.drain()
+
+    def root_added(self, obj):
+        if not self.deferred:
+            self.increment(obj)
+
+    def root_removed(self, obj):
+        if self.deferred:
+            if obj.ref_count == 0:
+                self.zct[obj.id] = obj
+            else:
+                self.possible_root(obj)
+        else:
+            self.decrement(obj)
+            self.drain()
+
+    def increment(self, obj):
+        self.updates += 1
+        obj.ref_count += 1
+        if not self.coalesced:
+            # Logged increments are applied out of order with immediate root decrements, so a
+            # coalesced engine leaves purple candidates for trial deletion to decide.
+            obj.color = BLACK
+
+    def decrement(self, obj):
+        self.updates += 1
+        obj.ref_count -= 1
+        if obj.ref_count == 0:
+            if self.log or (self.deferred and self.is_rooted(obj)):
+                self.zct[obj.id] = obj
+            else:
+                self.free_queue.append(obj)
+        else:
+            self.possible_root(obj)
+
+    def possible_root(self, obj):
+        if obj.color != PURPLE:
+            obj.color = PURPLE
+            if not obj.buffered:
+                obj.buffered = True
+                self.candidates[obj.id] = obj
+
+    def drain(self):
+        objects = self.objects
+        queue = self.free_queue
+        while queue:
+            obj = queue.pop()
+            if obj.ref_count != 0 or obj.start_index is None:
+                continue
+            for ref in self.log.pop(obj.id, obj.refs):
+                self.decrement(objects[ref])
+            obj.color = BLACK
+            if obj.buffered:
+                obj.buffered = False
+                del self.candidates[obj.id]
+            self.release(obj)
+
+    def release(self, obj):
+        self.zct.pop(obj.id, None)
+        self.log.pop(obj.id, None)
+        self.free_object(obj)
+        self.freed += 1
+
+    def apply_log(self):
+        objects = self.objects
+        log, self.log = self.log, {}
+        decrements = []
+        for obj_id, old_refs in log.items():
+            new_refs = objects[obj_id].refs
+            if new_refs == old_refs:
+                continue
+            delta = Counter(new_refs)
+            delta.subtract(old_refs)
+            for ref, change in delta.items():
+                for _ in range(change):
+                    self.increment(objects[ref])
+                for _ in range(-change):
+                    decrements.append(ref)
+        for ref in decrements:
+            self.decrement(objects[ref])
+
+    def process_zct(self):
+        zct, self.zct = self.zct, {}
+        for obj in zct.values():
+            if obj.start_index is None:
+                continue
+            if obj.ref_count > 0:
+                self.possible_root(obj)
+            elif self.deferred and self.is_rooted(obj):
+                self.zct[obj.id] = obj
+            else:
+                self.free_queue.append(obj)
+        self.drain()
+
+    def collect(self):
+        before = self.freed
+        self.apply_log()
+        self.process_zct()
+        return self.freed - before
+
+    def externally_held(self, obj):
+        return obj.ref_count > 0 or (self.deferred and self.is_rooted(obj))
+
+    def collect_cycles(self):
+        before = self.freed
+        candidates, self.candidates = self.candidates, {}
+        roots = []
+        for obj in candidates.values():
+            if obj.color == PURPLE and obj.start_index is not None:
+                self.mark_gray(obj)
+                roots.append(obj)
+            else:
+                obj.buffered = False
+        for obj in roots:
+            self.scan(obj)
+        for obj in roots:
+            obj.buffered = False
+            self.collect_white(obj)
+        return self.freed - before
+
+    def mark_gray(self, obj):
+        objects = self.objects
+        stack = [obj]
+        while stack:
+            node = stack.pop()
+            if node.color == GRAY:
+                continue
+            node.color = GRAY
+            for ref in node.refs:
+                child = objects[ref]
+                child.ref_count -= 1
+                stack.append(child)
+
+    def scan(self, obj):
+        objects = self.objects
+        stack = [obj]
+        while stack:
+            node = stack.pop()
+            if node.color != GRAY:
+                continue
+            if self.externally_held(node):
+                self.scan_black(node)
+            else:
+                node.color = WHITE
+                stack.extend(objects[ref] for ref in node.refs)
+
+    def scan_black(self, obj):
+        objects = self.objects
+        obj.color = BLACK
+        stack = [obj]
+        while stack:
+            node = stack.pop()
+            for ref in node.refs:
+                child = objects[ref]
+                child.ref_count += 1
+                if child.color != BLACK:
+                    child.color = BLACK
+                    stack.append(child)
+
+    def collect_white(self, obj):
+        objects = self.objects
+        stack = [obj]
+        while stack:
+            node = stack.pop()
+            # A white cycle refers back to members released earlier in this walk; their ids are empty.
+            if node is not None and node.color == WHITE and not node.buffered:
+                node.color = BLACK
+                stack.extend(objects[ref] for ref in node.refs)
+                self.release(node)
@@ -0,0 +1,70 @@
+import bisect
+import random
+
+import pytest
+
+from allocators import make_allocator
+
+HEAP = 10007
+STEPS = 5000
+
+
+def linear_first_fit(free, size, cursor=0):
+    starts = free.starts
+    first = bisect.bisect_left(starts, cursor)
+    for i in range(len(starts)):
+        start = starts[(first + i) % len(starts)]
+        if free.lengths[start] >= size:
+            return start
+    return None
+
+
+@pytest.mark.parametrize("name", ["first-fit", "next-fit"])
+def test_fit_lookups_match_linear_scan(name):
+    rng = random.Random(1)
+    allocator = make_allocator(name, HEAP)
+    live = []
+    for _ in range(STEPS):
+        if live and rng.random() < 0.45:
+            allocator.release(*live.pop(rng.randrange(len(live))))
+            continue
+        size = rng.randint(1, 500)
+        expected = linear_first_fit(allocator.free, size, getattr(allocator, "cursor", 0))
+        start = allocator.allocate(size)
+        assert start == expected
+        if start is not None:
+            live.append((start, size))
+
+
+@pytest.mark.parametrize("name", ["best-fit", "segregated-fit"])
+def test_fit_lookups_find_space_when_it_exists(name):
+    rng = random.Random(1)
+    allocator = make_allocator(name, HEAP)
+    live = []
+    for _ in range(STEPS):
+        if live and rng.random() < 0.45:
+            allocator.release(*live.pop(rng.randrange(len(live))))
+            continue
+        size = rng.randint(1, 500)
+        fits = allocator.free.largest() >= size
+        start = allocator.allocate(size)
+        assert (start is not None) == fits
+        if start is not None:
+            live.append((start, size))
+
+
+def test_best_fit_takes_the_smallest_extent_that_fits():
+    allocator = make_allocator("best-fit", 100)
+    for start in (0, 20, 50):
+        allocator.reserve(start, 10)
+    # Free extents: 10..20 (10), 30..50 (20), 60..100 (40).
+    assert allocator.allocate(15) == 30
+    assert allocator.allocate(10) == 10
+
+
+def test_segregated_fit_takes_the_head_of_the_next_class_up():
+    allocator = make_allocator("segregated-fit", 100)
+    for start in (0, 20, 50):
+        allocator.reserve(start, 10)
+    # 10 is in class 3 with the request; 20 (class 4) is the lowest extent certain to fit.
+    assert allocator.allocate(9) == 30
@@ -0,0 +1,67 @@
+import csv
+
+import numpy as np
+import pytest
+
+import gc_export
+from gc_cli import main, run_headless
+from gc_engine import make_manager
+from gc_export import flatten, make_exporter
+
+CYCLES = 50
+BATCH = 16  # several batches and a partial one
+
+
+def export(path):
+    manager = make_manager("mark-and-sweep", 3000, seed=1)
+    with make_exporter(str(path), batch=BATCH) as exporter:
+        records, _ = run_headless(manager, CYCLES, exporter, keep_records=True)
+    return records
+
+
+def assert_columns(columns, records):
+    # Columnar formats hold flattened records: one column per histogram size class.
+    rows = [flatten(record) for record in records]
+    assert set(columns) == set(rows[0])
+    for name in rows[0]:
+        assert np.allclose(columns[name], [row[name] for row in rows]), name
+
+
+def test_npy_export_loads_back_as_one_structured_array(tmp_path):
+    records = export(tmp_path / "cycles.npy")
+    array = np.load(tmp_path / "cycles.npy")
+    assert len(array) == CYCLES
+    assert_columns({name: array[name] for name in array.dtype.names}, records)
+
+
+def test_npz_export_loads_back_one_array_per_column(tmp_path):
+    records = export(tmp_path / "cycles.npz")
+    with np.load(tmp_path / "cycles.npz") as archive:
+        assert_columns({name: archive[name] for name in archive.files}, records)
+    assert [path.name for path in tmp_path.iterdir()] == ["cycles.npz"]
+
+
+def test_csv_export_loads_back_every_row(tmp_path):
+    records = export(tmp_path / "cycles.csv")
+    with open(tmp_path / "cycles.csv", newline='') as file:
+        rows = list(csv.DictReader(file))
+    assert len(rows) == CYCLES
+    for row, record in zip(rows, records):
+        assert int(row["cycle"]) == record["cycle"]
+        assert int(row["used_memory"]) == record["used_memory"]
+        assert float(row["gc_time"]) == pytest.approx(record["gc_time"])
+        assert row["free_histogram"].split() == [str(count) for count in record["free_histogram"]]
+
+
+def test_parquet_export_loads_back_every_row(tmp_path):
+    parquet = pytest.importorskip("pyarrow.parquet")
+    records = export(tmp_path / "cycles.parquet")
+    table = parquet.read_table(tmp_path / "cycles.parquet")
+    assert_columns({name: table.column(name).to_numpy() for name in table.column_names}, records)
+
+
+@pytest.mark.skipif(gc_export.pyarrow is not None, reason="pyarrow is installed")
+def test_cli_rejects_parquet_without_pyarrow_before_opening_files(tmp_path):
+    with pytest.raises(SystemExit):
+        main(["--cycles", "5", "--output", str(tmp_path / "cycles.parquet"), "--record", str(tmp_path / "run.gctr")])
+    assert not list(tmp_path.iterdir())
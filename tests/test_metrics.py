@@ -0,0 +1,53 @@
+import numpy as np
+import pytest
+
+from metrics import P2Quantile, RingBuffer, Series
+
+DISTRIBUTIONS = {
+    "uniform": lambda rng, n: rng.random(n),
+    "normal": lambda rng, n: rng.normal(10.0, 2.0, n),
+    "exponential": lambda rng, n: rng.exponential(1.0, n),
+    "log-normal": lambda rng, n: rng.lognormal(0.0, 1.0, n),
+}
+
+
+@pytest.mark.parametrize("p", [0.5, 0.9, 0.99])
+@pytest.mark.parametrize("distribution", list(DISTRIBUTIONS))
+def test_p2_quantile_tracks_np_percentile(distribution, p):
+    samples = DISTRIBUTIONS[distribution](np.random.default_rng(1), 50000)
+    estimator = P2Quantile(p)
+    for x in samples:
+        estimator.add(float(x))
+    estimate = estimator.value()
+    # Compare ranks rather than values, so heavy tails are held to the same standard as the rest.
+    assert abs(np.mean(samples <= estimate) - p) < 0.01
+    assert estimate == pytest.approx(np.percentile(samples, p * 100), rel=0.05)
+
+
+def test_p2_quantile_is_exact_below_five_samples():
+    estimator = P2Quantile(0.9)
+    for x in (3.0, 1.0, 2.0):
+        estimator.add(x)
+    assert estimator.value() == pytest.approx(np.percentile([3.0, 1.0, 2.0], 90))
+
+
+def test_ring_buffer_keeps_the_latest_values_in_order():
+    buffer = RingBuffer(4)
+    for x in range(10):
+        buffer.append(x)
+    assert len(buffer) == 4
+    assert buffer.values().tolist() == [6, 7, 8, 9]
+
+
+def test_series_stays_bounded_and_keeps_exact_running_stats():
+    samples = np.random.default_rng(2).random(10000)
+    series = Series(capacity=64)
+    for x in samples:
+        series.append(float(x))
+    assert len(series) == len(samples)
+    assert series.mean == pytest.approx(samples.mean())
+    assert (series.min, series.max, series.last) == (samples.min(), samples.max(), samples[-1])
+    assert np.array_equal(series.recent(10), samples[-10:])
+    x, values = series.history()
+    assert len(values) <= 65
+    assert x[0] == 0  # the coarsest level still reaches back to the first sample
@@ -0,0 +1,36 @@
+import numpy as np
+import pytest
+
+from gc_engine import make_manager
+from object_graph import mark_csr
+from parallel_mark import MARK_MODES, parallel_mark
+
+MEMORY = 3000
+CYCLES = 300
+
+
+def random_graph(nodes, degree, seed):
+    rng = np.random.default_rng(seed)
+    indptr = np.zeros(nodes + 1, dtype=np.int64)
+    np.cumsum(rng.poisson(degree, nodes), out=indptr[1:])
+    return indptr, rng.integers(0, nodes, int(indptr[-1]), dtype=np.int64)
+
+
+@pytest.mark.parametrize("workers", [1, 4])
+@pytest.mark.parametrize("mode", MARK_MODES)
+def test_parallel_mark_equals_serial_bitmap(mode, workers):
+    nodes = 20000
+    indptr, indices = random_graph(nodes, 1.2, seed=3)
+    roots = np.arange(0, nodes, 997)
+    expected = mark_csr(indptr, indices, roots, nodes)
+    assert np.array_equal(parallel_mark(indptr, indices, roots, nodes, workers, mode, batch=16), expected)
+
+
+@pytest.mark.parametrize("algorithm", ["mark-and-sweep", "generational"])
+def test_parallel_mark_matches_serial(algorithm):
+    serial = make_manager(algorithm, MEMORY, seed=7)
+    parallel = make_manager(algorithm, MEMORY, seed=7, mark_workers=3, mark_mode="threads")
+    for _ in range(CYCLES):
+        (collected, used, layout), (parallel_collected, parallel_used, parallel_layout) = serial.simulate_cycle(), parallel.simulate_cycle()
+        assert (collected, used) == (parallel_collected, parallel_used)
+        assert list(layout.extents()) == list(parallel_layout.extents())
@@ -0,0 +1,32 @@
+import random
+
+import pytest
+
+from gc_engine import ALGORITHMS, algorithm_key, make_manager
+from gc_snapshots import SnapshotStore
+
+COLLECTORS = [algorithm_key(name) for name in ALGORITHMS]
+MEMORY = 3000
+CYCLES = 300
+
+
+@pytest.mark.parametrize("on_disk", [False, True])
+@pytest.mark.parametrize("algorithm", COLLECTORS)
+def test_snapshot_store_gives_back_every_cycle(algorithm, on_disk, tmp_path):
+    manager = make_manager(algorithm, MEMORY, seed=3)
+    path = str(tmp_path / "layouts.gcsn") if on_disk else None
+    store = SnapshotStore(MEMORY, path=path, keyframe_interval=16)
+    manager.heap.record_changes()
+    truth = []
+    for _ in range(100):
+        _, _, layout = manager.simulate_cycle()
+        truth.append(sorted(layout.extents()))
+        store.append(manager.heap.drain_changes())
+    if on_disk:
+        store.close()
+        store = SnapshotStore.open(path)
+    order = list(range(len(truth)))
+    random.Random(0).shuffle(order)
+    for cycle in order + list(range(len(truth))):
+        assert sorted(store.layout(cycle).extents()) == truth[cycle]
+    store.close()
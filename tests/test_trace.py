@@ -0,0 +1,35 @@
+import pytest
+
+from gc_engine import ALGORITHMS, algorithm_key, make_manager
+from gc_trace import TraceReplayer, TraceWriter, count_cycles
+
+COLLECTORS = [algorithm_key(name) for name in ALGORITHMS]
+MEMORY = 3000
+CYCLES = 300
+
+
+def run(manager, cycles=CYCLES):
+    return [manager.simulate_cycle() for _ in range(cycles)]
+
+
+def outcomes(results):
+    return [(collected, used, list(layout.extents())) for collected, used, layout in results]
+
+
+@pytest.mark.parametrize("algorithm", COLLECTORS)
+def test_same_seed_gives_the_same_run(algorithm):
+    first = run(make_manager(algorithm, MEMORY, seed=5, workload="bursty"))
+    second = run(make_manager(algorithm, MEMORY, seed=5, workload="bursty"))
+    assert outcomes(first) == outcomes(second)
+
+
+@pytest.mark.parametrize("workload", [None, "bursty"])
+@pytest.mark.parametrize("algorithm", COLLECTORS)
+def test_replay_on_same_collector_reproduces_run(algorithm, workload, tmp_path):
+    path = str(tmp_path / "run.gctr")
+    recorder = TraceWriter(path)
+    recorded = run(make_manager(algorithm, MEMORY, seed=5, workload=workload, recorder=recorder))
+    recorder.close()
+    assert count_cycles(path) == CYCLES
+    replayed = run(make_manager(algorithm, MEMORY, replay=TraceReplayer(path)))
+    assert outcomes(replayed) == outcomes(recorded)
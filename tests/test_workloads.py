@@ -0,0 +1,47 @@
+import numpy as np
+import pytest
+
+from gc_engine import make_manager
+from workloads import WORKLOADS, BimodalSizes, Bursts, GenerationalLifetimes, LogNormalSizes, PhasedLifetimes, PowerLawSizes, UniformSizes
+
+SIZES = [UniformSizes(), PowerLawSizes(), PowerLawSizes(alpha=0.5), BimodalSizes(), LogNormalSizes(), LogNormalSizes(sigma=3.0)]
+RANGES = [(20, 100), (1, 1), (1, 2), (5, 100000)]
+
+
+@pytest.mark.parametrize("low,high", RANGES)
+@pytest.mark.parametrize("sizes", SIZES, ids=lambda sizes: type(sizes).__name__)
+def test_sizes_stay_inside_the_range(sizes, low, high):
+    samples = sizes.sample(np.random.default_rng(1), 100000, low, high)
+    assert samples.dtype.kind == "i"
+    assert samples.min() >= low and samples.max() <= high
+
+
+def test_power_law_favours_small_objects():
+    samples = PowerLawSizes().sample(np.random.default_rng(1), 100000, 20, 100)
+    assert np.median(samples) < 40
+    assert samples.max() == 100
+
+
+def test_lifetimes_are_positive_or_left_to_the_mutator():
+    rng = np.random.default_rng(1)
+    assert GenerationalLifetimes().sample(rng, 10000, 0).min() >= 1
+    phased = PhasedLifetimes(phase_length=20).sample(rng, 10000, 7)
+    assert set(np.unique(phased)) <= {-1, 13}
+
+
+def test_bursts_add_to_the_base_rate():
+    rng = np.random.default_rng(1)
+    counts = [Bursts(rate=2, probability=0.5, size=16).count(rng) for _ in range(1000)]
+    assert min(counts) >= 2
+    assert max(counts) > 2
+
+
+@pytest.mark.parametrize("workload", list(WORKLOADS))
+def test_workloads_allocate_inside_object_range_and_release_pins(workload):
+    manager = make_manager("mark-and-sweep", 5000, seed=1, workload=workload, object_range=(8, 64))
+    for _ in range(200):
+        manager.simulate_cycle()
+        assert all(8 <= obj.size <= 64 for obj in manager.allocated_memory)
+        # Every pinned object is still rooted, and no expired pin lingers.
+        assert manager.pinned <= set(manager.roots)
+        assert all(cycle >= manager.workload.cycle for cycle in manager.workload.deaths)
@@ -0,0 +1,161 @@
+import math
+
+import numpy as np
+
+BATCH = 4096  # object sizes drawn per NumPy call
+
+
+class UniformSizes:
+    def sample(self, rng, n, low, high):
+        return rng.integers(low, high, size=n, endpoint=True)
+
+
+class PowerLawSizes:
+    # Pareto tail truncated to [low, high]: small objects dominate, a few are very large.
+    # Sampled by inverting the truncated CDF, so no draw is wasted on rejections.
+    def __init__(self, alpha=1.5):
+        self.alpha = alpha
+
+    def sample(self, rng, n, low, high):
+        u = rng.random(n)
+        a = self.alpha
+        ratio = (low / (high + 1)) ** a
+        sizes = low / (1 - u * (1 - ratio)) ** (1 / a)
+        return np.minimum(sizes.astype(np.int64), high)
+
+
+class BimodalSizes:
+    # Mostly small objects from the bottom of the range, the rest large ones from the top.
+    def __init__(self, small_fraction=0.85, spread=0.2):
+        self.small_fraction = small_fraction
+        self.spread = spread
+
+    def sample(self, rng, n, low, high):
+        width = max(0, int((high - low) * self.spread))
+        small = rng.integers(low, low + width, size=n, endpoint=True)
+        large = rng.integers(high - width, high, size=n, endpoint=True)
+        return np.where(rng.random(n) < self.small_fraction, small, large)
+
+
+class LogNormalSizes:
+    # Median at the geometric mean of the range; sigma is the spread of log(size).
+    def __init__(self, sigma=0.6):
+        self.sigma = sigma
+
+    def sample(self, rng, n, low, high):
+        sizes = rng.lognormal(math.log(math.sqrt(low * high)), self.sigma, size=n)
+        return np.clip(np.rint(sizes), low, high).astype(np.int64)
+
+
+class GenerationalLifetimes:
+    # The weak generational hypothesis: most objects die within a few cycles of their allocation,
+    # the rest live for much longer. Lifetimes are in cycles, geometrically distributed.
+    def __init__(self, young_fraction=0.9, mean_young=2.0, mean_old=100.0):
+        self.young_fraction = young_fraction
+        self.mean_young = mean_young
+        self.mean_old = mean_old
+
+    def sample(self, rng, n, cycle):
+        young = rng.geometric(1 / self.mean_young, size=n)
+        old = rng.geometric(1 / self.mean_old, size=n)
+        return np.where(rng.random(n) < self.young_fraction, young, old)
+
+
+class PhasedLifetimes:
+    # Objects die together at the end of the phase they were allocated in, like the per-request
+    # or per-pass data of a server or a compiler; a few survive and are left to the mutator (-1).
+    def __init__(self, phase_length=20, survivor_fraction=0.05):
+        self.phase_length = phase_length
+        self.survivor_fraction = survivor_fraction
+
+    def sample(self, rng, n, cycle):
+        remaining = self.phase_length - cycle % self.phase_length
+        return np.where(rng.random(n) < self.survivor_fraction, -1, remaining)
+
+
+class Bursts:
+    # `rate` allocations a cycle, plus a burst of about `size` more with probability `probability`.
+    def __init__(self, rate=1, probability=0.0, size=0):
+        self.rate = rate
+        self.probability = probability
+        self.size = size
+
+    def count(self, rng):
+        if self.probability and rng.random() < self.probability:
+            return self.rate + int(rng.poisson(self.size))
+        return self.rate
+
+
+class Workload:
+    # Replaces the mutator's one uniform allocation per cycle: a burst model decides how many objects
+    # a cycle allocates, a size distribution sizes them in batches of BATCH, and a lifetime model
+    # decides for how many cycles each one is pinned as a root, out of the random mutator's reach.
+    # Objects without a lifetime are linked in by the mutator and live as long as it keeps them
+    # reachable, as do the ones it made reachable from elsewhere by the time they are unpinned.
+    # Everything goes through the manager's allocate, link and root methods, so traces record and
+    # replay it as usual.
+    def __init__(self, sizes=None, lifetimes=None, bursts=None, batch=BATCH):
+        self.sizes = sizes if sizes is not None else UniformSizes()
+        self.lifetimes = lifetimes
+        self.bursts = bursts if bursts is not None else Bursts()
+        self.batch = batch
+        self.rng = None
+        self.low = self.high = None
+        self.buffer = np.empty(0, dtype=np.int64)
+        self.position = 0
+        self.cycle = 0
+        self.deaths = {}  # cycle -> objects to unroot
+
+    def attach(self, manager, rng):
+        self.rng = rng
+        self.low, self.high = manager.object_range
+
+    def next_sizes(self, n):
+        sizes = []
+        while n:
+            if self.position == len(self.buffer):
+                self.buffer = self.sizes.sample(self.rng, self.batch, self.low, self.high)
+                self.position = 0
+            take = min(n, len(self.buffer) - self.position)
+            sizes.extend(self.buffer[self.position:self.position + take].tolist())
+            self.position += take
+            n -= take
+        return sizes
+
+    def expire(self, manager):
+        for obj in self.deaths.pop(self.cycle, ()):
+            manager.pinned.discard(obj.id)
+            manager.remove_root(manager.roots.index(obj.id))
+
+    def run(self, manager):
+        self.expire(manager)
+        sizes = self.next_sizes(self.bursts.count(self.rng))
+        lifetimes = self.lifetimes.sample(self.rng, len(sizes), self.cycle).tolist() if self.lifetimes is not None else None
+        for i, size in enumerate(sizes):
+            obj = manager.allocate(size)
+            if obj is None:
+                continue
+            if lifetimes is None or lifetimes[i] < 0:
+                manager.link(obj)
+            else:
+                manager.add_root(obj)
+                manager.pinned.add(obj.id)
+                self.deaths.setdefault(self.cycle + lifetimes[i], []).append(obj)
+        self.cycle += 1
+
+
+WORKLOADS = {
+    "uniform": lambda: Workload(),
+    "power-law": lambda: Workload(PowerLawSizes(), GenerationalLifetimes()),
+    "bimodal": lambda: Workload(BimodalSizes(), GenerationalLifetimes()),
+    "log-normal": lambda: Workload(LogNormalSizes(), GenerationalLifetimes()),
+    "phased": lambda: Workload(LogNormalSizes(), PhasedLifetimes(), Bursts(probability=0.1, size=8)),
+    "bursty": lambda: Workload(BimodalSizes(), GenerationalLifetimes(), Bursts(rate=2, probability=0.2, size=16)),
+}
+
+
+def make_workload(name):
+    try:
+        return WORKLOADS[name]()
+    except KeyError:
+        raise ValueError(f"Unknown workload '{name}', choose from {', '.join(WORKLOADS)}") from None